@@ -1,95 +1,149 @@
-import pyrealsense2 as rs
 import cv2
 import numpy as np
-from mediapipe import solutions
-from mediapipe.framework.formats import landmark_pb2
 import numpy as np
 import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
-
-#Create Pos marker - wget https://path-to-model/pose_landmarker.task -O pose_landmarker.task
-base_options = python.BaseOptions(model_asset_path='pose_landmarker.task')
-options = vision.PoseLandmarkerOptions(
-    base_options=base_options,
-    output_segmentation_masks=True
-)
-detector = vision.PoseLandmarker.create_from_options(options)
-
-
-def draw_landmarks_on_image(rgb_image, detection_result):
-  pose_landmarks_list = detection_result.pose_landmarks
-  annotated_image = np.copy(rgb_image)
-
-  # Loop through the detected poses to visualize.
-  for idx in range(len(pose_landmarks_list)):
-    pose_landmarks = pose_landmarks_list[idx]
-
-    # Draw the pose landmarks.
-    pose_landmarks_proto = landmark_pb2.NormalizedLandmarkList()
-    pose_landmarks_proto.landmark.extend([
-      landmark_pb2.NormalizedLandmark(x=landmark.x, y=landmark.y, z=landmark.z) for landmark in pose_landmarks
-    ])
-    solutions.drawing_utils.draw_landmarks(
-      annotated_image,
-      pose_landmarks_proto,
-      solutions.pose.POSE_CONNECTIONS,
-      solutions.drawing_styles.get_default_pose_landmarks_style())
-    
-
-
-    
-  return annotated_image
-
-
-def process_and_save(imageArray, detector):
-    #change input here
-    imageCreator = mp.Image
-    mpImage = imageCreator(mp.ImageFormat.SRGB, imageArray)
-
-    detection_result = detector.detect(mpImage)
-
-    #could speed things up here posible
-    annotated_image = draw_landmarks_on_image(mpImage.numpy_view(), detection_result)
-    
-    return annotated_image
-
-
-# Configure the RealSense pipeline
-pipeline = rs.pipeline()
-config = rs.config()
-
-# Enable depth and color streams
-config.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, 30)
-# config.enable_stream(rs.stream.depth, 640, 480, rs.format.z16, 15)
-
-pipeline.start(config)
-
+import time
+from framePipeline import FramePipeline, DROP_OLDEST
+from poseLandmarker import PoseDetector, LIVE_RUNNING_MODE, VIDEO, EMPTY_RESULT, landmarks_to_array
+from skeletonRenderer import draw_skeleton
+from stageMetrics import StageMetrics
+from adaptiveScheduler import AdaptiveScheduler, VELOCITY, PCHIP
+from depthSampler import DepthSampler, yaw_degrees
+from frameSources import open_source, REALSENSE, REAL_TIME
+
+# Capture, inference and rendering run on separate threads connected by queues of this size.
+# DROP_OLDEST keeps latency bounded when a stage falls behind; BLOCK processes every frame.
+QUEUE_SIZE = 2
+DROP_POLICY = DROP_OLDEST
+
+# Adaptive scheduling for weak CPUs: the detector only runs as often as DETECT_BUDGET_MS per camera frame
+# (and MAX_DETECT_FPS) allows; the frames in between get estimated landmarks, so every frame still has a pose
+ADAPTIVE_SCHEDULING = False
+DETECT_BUDGET_MS = 8   # Average detector time allowed per camera frame
+MAX_DETECT_FPS = None  # e.g. 20
+ESTIMATOR = VELOCITY   # VELOCITY or PCHIP
+
+# Where frames come from and how replays are paced, see open_source(); RECORD_PATH records whatever is
+# captured as a session directory for replaying later
+FRAME_SOURCE = REALSENSE
+REPLAY_PACING = REAL_TIME
+RECORD_PATH = None
+
+# Metric depth at the landmarks (RealSense, .bag or recorded session with depth): depth is aligned to color
+# on the capture thread and sampled at all 33 landmark pixels at once
+USE_DEPTH = False
+
+# Per-stage latency: on-screen overlay, optional JSONL log and Prometheus endpoint (http://host:port/metrics)
+SHOW_METRICS = True
+METRICS_JSONL_PATH = None  # e.g. "metrics.jsonl", one summary line per second
+METRICS_PORT = None        # e.g. 9100
+
+metrics = StageMetrics(jsonl_path=METRICS_JSONL_PATH)
+if METRICS_PORT:
+    metrics.serve_prometheus(METRICS_PORT)
+
+scheduler = None
+if ADAPTIVE_SCHEDULING:
+    # The scheduler needs each detection's result (and cost) right away, so the detector runs synchronously
+    detector = PoseDetector(VIDEO)
+    scheduler = AdaptiveScheduler(metrics.timed("detect", lambda imageArray, timestamp_ms: landmarks_to_array(
+                                      detector.detect(mp.Image(mp.ImageFormat.SRGB, imageArray), timestamp_ms))),
+                                  DETECT_BUDGET_MS, MAX_DETECT_FPS, ESTIMATOR)
+else:
+    #Create Pos marker; LIVE_RUNNING_MODE queues frames with detect_async instead of blocking capture
+    # The callback times the asynchronous inference itself: auto timestamps come from the monotonic clock
+    detector = PoseDetector(LIVE_RUNNING_MODE, result_callback=lambda result, image, timestamp_ms:
+                            metrics.record("inference", time.monotonic() - timestamp_ms / 1000))
+
+
+def draw_landmarks_on_image(image, detection_result, bgr=False):
+  """Draws every detected pose straight into image (no copy) and returns it."""
+  for pose_index in range(len(detection_result.pose_landmarks)):
+    draw_skeleton(image, landmarks_to_array(detection_result, pose_index=pose_index), bgr=bgr)
+  return image
+
+
+def detect_pose(frame):
+    """Inference stage: queues one frame and returns the latest finished (result, timestamp_ms, its frame).
+
+    In LIVE_STREAM mode that result comes from an earlier frame, which is handed back with it so the
+    render stage draws (and samples depth) on the frame the pose was detected in. With the adaptive
+    scheduler it returns (landmarks, estimated) for every frame instead.
+    """
+    imageArray, _, timestamp_ms = frame
+    if scheduler is not None:
+        return scheduler.process(imageArray, timestamp_ms)
+
+    with metrics.time("convert"):
+        mpImage = mp.Image(mp.ImageFormat.SRGB, imageArray)
+    with metrics.time("detect"):
+        return detector.detect_async(mpImage, context=frame)
+
+
+# Open the frame source; RealSense depth runs at the color rate so every color frame has an aligned depth frame
+source = open_source(FRAME_SOURCE, REPLAY_PACING, depth=USE_DEPTH, fps=30, record_path=RECORD_PATH)
+depth_sampler = DepthSampler(source.depth_scale, source.intrinsics) if USE_DEPTH and source.depth_scale else None
+
+
+# Render stage stays on the main thread, where cv2.imshow has to run
+frame_pipeline = FramePipeline(metrics.timed("capture", source.read), detect_pose, queue_size=QUEUE_SIZE, drop_policy=DROP_POLICY)
+frame_pipeline.start()
+display_image = None
 
 try:
-    while True:
-        # Wait for the next frame
-        frames = pipeline.wait_for_frames()
-        color_frame = frames.get_color_frame()
-        # depth_frame = frames.get_depth_frame()
-
-        # Convert images to numpy arrays
-        color_image = np.asanyarray(color_frame.get_data())
-        # depth_image = np.asanyarray(depth_frame.get_data())
-
-
-        #alter images 
-        finalImage = process_and_save(color_image, detector)
-
-        cv2.imshow("Color Stream", finalImage)
-
-        # depth_colormap = cv2.applyColorMap(cv2.convertScaleAbs(depth_image, alpha=0.03), cv2.COLORMAP_JET)
-        # cv2.imshow("Depth Stream", depth_colormap)
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+    for frame, inference in frame_pipeline:
+        if scheduler is None:
+            # LIVE_STREAM results finish after their frame: draw (and measure) each on the frame it came from
+            inference, _, result_frame = inference
+            if result_frame is not None:
+                frame = result_frame
+            else:
+                inference = EMPTY_RESULT  # Its frame is gone; never draw a pose on another frame
+        color_image, depth_image, _ = frame
+
+        with metrics.time("draw"):
+            # Draw into a reused display buffer; the camera frame itself stays untouched
+            if display_image is None:
+                display_image = np.empty_like(color_image)
+            np.copyto(display_image, color_image)
+
+            #alter images 
+            if scheduler is not None:
+                landmarks, _ = inference  # Estimated frames are drawn the same way
+                finalImage = draw_skeleton(display_image, landmarks, bgr=True)
+            else:
+                landmarks = landmarks_to_array(inference)
+                finalImage = draw_landmarks_on_image(display_image, inference, bgr=True)
+
+        if depth_sampler is not None and depth_image is not None and not np.isnan(landmarks[0, 0]):
+            with metrics.time("depth"):
+                depths = depth_sampler.sample(depth_image, landmarks)
+                yaw = yaw_degrees(depth_sampler.points(landmarks, depths))
+            cv2.putText(finalImage, f"Yaw {yaw:.1f} deg", (finalImage.shape[1] - 200, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        metrics.set_gauge("dropped_frames", frame_pipeline.dropped_frames)
+        if scheduler is not None:
+            metrics.set_gauge("detection_rate", round(scheduler.detection_rate, 3))
+        if SHOW_METRICS:
+            metrics.draw_overlay(finalImage)
+
+        with metrics.time("show"):
+            cv2.imshow("Color Stream", finalImage)
+
+            if depth_sampler is not None and depth_image is not None:
+                depth_colormap = cv2.applyColorMap(cv2.convertScaleAbs(depth_image, alpha=0.03), cv2.COLORMAP_JET)
+                cv2.imshow("Depth Stream", depth_colormap)
+
+            key = cv2.waitKey(1) & 0xFF
+        metrics.tick()
+
+        if key == ord('q'):
             break
 finally:
-    pipeline.stop()
+    frame_pipeline.stop()
+    source.close()
+    detector.close()
     cv2.destroyAllWindows()
 
 
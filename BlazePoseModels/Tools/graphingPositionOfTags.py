@@ -1,9 +1,14 @@
 import cv2
 import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graphView import GraphView
 
 # Create a blank white canvas
 width, height = 700, 940
-canvas = np.ones((height, width, 3), dtype=np.uint8) * 255
+graph_view = GraphView(width, height)
 
 # Initialize an empty list to store points
 points = []
@@ -16,15 +21,8 @@ while True:
     # points.append((x, y))
 
     # Draw the updated graph
-    canvas = np.ones((height, width, 3), dtype=np.uint8) * 255  # Clear canvas
-    
-    # Draw axes
-    cv2.line(canvas, (50, height - 50), (width - 50, height - 50), (0, 0, 0), 2)  # X-axis
-    cv2.line(canvas, (50, height - 50), (50, 50), (0, 0, 0), 2)  # Y-axis
-
-    # Plot points
-    for i in range(1, len(points)):
-        cv2.circle(canvas, points[i], 3, (0, 0, 255), -1)
+    # Reset the prerendered axes and plot every point (but the first, as before) in one call
+    canvas = graph_view.draw(points[1:])
 
     # Show the updated image
     cv2.imshow("Real-Time Graph", canvas)
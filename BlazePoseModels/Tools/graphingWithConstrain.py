@@ -2,13 +2,13 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import time
+import os
+import sys
 
-class NormalizedLandmark:
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
-
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graphView import GraphView
+from landmarkFrame import LandmarkFrame
+from frameSources import open_source
 
 # Initialize MediaPipe Pose
 mp_pose = mp.solutions.pose
@@ -16,7 +16,8 @@ pose = mp_pose.Pose(static_image_mode=False, model_complexity=2)
 mp_drawing = mp.solutions.drawing_utils
 
 # Start Video Capture
-cap = cv2.VideoCapture(0)
+FRAME_SOURCE = "webcam:0"  # Any open_source() spec
+source = open_source(FRAME_SOURCE)
 
 prev_angle = None
 prev_time = None
@@ -24,68 +25,29 @@ prev_time = None
 NEUTRAL_THRESHOLD = 0.05
 
 width, height = 700, 940
-canvas = np.ones((height, width, 3), dtype=np.uint8) * 255
+graph_view = GraphView(width, height, point_radius=5, point_color=(0, 255, 0))
 
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
+for frame, _, _ in source:
 
     # Convert frame to RGB
     frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     results = pose.process(frame_rgb)
 
     if results.pose_landmarks:
-        landmarks = results.pose_landmarks.landmark
+        landmark_frame = LandmarkFrame.from_pose_landmarks(results.pose_landmarks.landmark)
 
         h,w,_ = frame.shape
 
-        normalizedLandmarks =[]
-        for landmark in landmarks:
-            normalizedLandmarks.append( NormalizedLandmark(int(landmark.x * w), int(landmark.y * h), landmark.z) )
-
-        if not normalizedLandmarks:
-            normalizedLandmarks = []
-        
-        greatestX = -100000
-        minimalX = 1000000
-        greatestY = -100000
-        minimalY = 100000
-        averageZ = 0
-
-
-        for landmark in normalizedLandmarks:
-            if landmark.x > greatestX:
-                greatestX = landmark.x
-            if landmark.x < minimalX:
-                minimalX = landmark.x
-            if landmark.y > greatestY:
-                greatestY = landmark.y
-            if landmark.y< minimalY:
-                minimalY = landmark.y
-            averageZ += landmark.z
-        averageZ /= (len(normalizedLandmarks))
+        # Pixel-space box around all landmarks in one vectorized min/max
+        box = landmark_frame.bounding_box(w, h)
+        minimalX, greatestX, minimalY, greatestY = box.x1, box.x2, box.y1, box.y2
+        averageZ = float(landmark_frame.z.mean())
 
         cv2.rectangle(frame, (minimalX, minimalY), (greatestX, greatestY), (255, 0, 0), 2)
         
         
-        # Get 3D Z-coordinates for shoulders
-        left_shoulder_z = landmarks[11].z
-        right_shoulder_z = landmarks[12].z
-
-        # Get X-coordinates (horizontal distance) for shoulders
-        left_shoulder_x = landmarks[11].x
-        right_shoulder_x = landmarks[12].x
-
-        # Compute shoulder width (distance in X-coordinates)
-        shoulder_width = abs(right_shoulder_x - left_shoulder_x)
-
-        # Compute yaw angle using arctan
-        if shoulder_width > 0:  # Avoid division by zero
-            yaw_angle_rad = np.arctan((right_shoulder_z - left_shoulder_z) / shoulder_width)
-            yaw_angle_deg = np.degrees(yaw_angle_rad)  # Convert to degrees
-        else:
-            yaw_angle_deg = 0  # No valid shoulder width detected
+        # Yaw from the shoulders' depth difference over their horizontal distance
+        yaw_angle_deg = landmark_frame.yaw_degrees()
 
         # Display yaw angle on screen
         font = cv2.FONT_HERSHEY_SIMPLEX
@@ -102,32 +64,14 @@ while cap.isOpened():
         cv2.putText(frame, f"Yaw Angle: {yaw_angle_deg:.2f} deg", (30, 50),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
         
-        normalized_points = [
-            NormalizedLandmark(
-                int((l.x - minimalX) / (greatestX - minimalX) * 500),  # Normalize X
-                int((l.y - minimalY) / (greatestY - minimalY) * 500),
-                l.z   # Normalize Y
-            )
-            for l in normalizedLandmarks
-        ]
+        # Landmarks scaled into the bounding box, as (33, 2) graph coordinates
+        normalized_points = landmark_frame.normalized_to(box, w, h, size=500, offset=0)
         #Graphing Points
-    
-        #update points
-        points = normalizedLandmarks
-
-
-        canvas = np.ones((height, width, 3), dtype=np.uint8) * 255  # Clear canvas
-    
-        # Draw axes
-        cv2.line(canvas, (50, height - 50), (width - 50, height - 50), (0, 0, 0), 2)  # X-axis
-        cv2.line(canvas, (50, height - 50), (50, 50), (0, 0, 0), 2)  # Y-axis
 
-        # Plot points
-        if(points!= None):
-            for l in normalized_points:
-                cv2.circle(canvas, (l.x, l.y), 5, (0, 255, 0), -1)
+        # Reset the prerendered axes and plot every point in one call
+        canvas = graph_view.draw(normalized_points)
         
-        y= int(-landmarks[12].z *500)  + 450
+        y= int(-landmark_frame.right_shoulder[2] *500)  + 450
 
         cv2.line(canvas, (0,y), (700,y), (0,0,250))
         # print(y)
@@ -143,5 +87,5 @@ while cap.isOpened():
 
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
-cap.release()
+source.close()
 cv2.destroyAllWindows()
\ No newline at end of file
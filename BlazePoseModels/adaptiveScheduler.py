@@ -0,0 +1,127 @@
+import time
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+from landmarkFrame import NUM_LANDMARKS, LANDMARK_FIELDS
+
+VELOCITY = "velocity"  # Constant-velocity extrapolation from the last two detections
+PCHIP = "pchip"        # PCHIP curve through the recent detections (as in PCHIP_Interploator.py), extrapolated
+
+MAX_EXTRAPOLATION_MS = 250  # Estimates never run further ahead of the last detection than this
+
+
+class AdaptiveScheduler:
+    """Runs pose detection only as often as a latency or FPS budget allows and estimates the frames in between.
+
+    Every camera frame still gets a (33, 4) landmark array: detected ones come from detect(frame,
+    timestamp_ms), the others are extrapolated from the recent detections by the chosen estimator.
+
+    latency_budget_ms is the average detector time allowed per camera frame. Each frame adds that much
+    credit and a detection is run once the credit covers its (running average) cost, so a detector that
+    takes 40 ms under a 10 ms budget runs on every fourth frame and a fast one on every frame.
+    max_detect_fps caps detections per second on top of that. Visibility is held from the last detection,
+    and no pose is estimated before the first detection or after a detection that found none.
+    """
+
+    def __init__(self, detect, latency_budget_ms=None, max_detect_fps=None, estimator=VELOCITY, history=4,
+                 max_extrapolation_ms=MAX_EXTRAPOLATION_MS):
+        if estimator not in (VELOCITY, PCHIP):
+            raise ValueError(f"Unknown estimator: {estimator}")
+
+        self.detect = detect
+        self.latency_budget_ms = latency_budget_ms
+        self.min_interval_ms = 1000 / max_detect_fps if max_detect_fps else 0.0
+        self.estimator = estimator
+        self.max_extrapolation_ms = max_extrapolation_ms
+
+        # Recent detections with a pose, oldest first
+        self.times = np.zeros(max(history, 2), dtype=np.float64)
+        self.poses = np.zeros((len(self.times), NUM_LANDMARKS, LANDMARK_FIELDS), dtype=np.float32)
+        self.count = 0
+        self._curve = None
+
+        self.detect_ms = None  # Running average of the detector's cost
+        self.credit_ms = 0.0
+        self.last_detect_ms = -np.inf
+        self.frames = 0
+        self.detections = 0
+
+    @property
+    def detection_rate(self):
+        """Fraction of frames that went through the detector."""
+        return self.detections / max(self.frames, 1)
+
+    def reset(self):
+        self.count = 0
+        self._curve = None
+
+    def process(self, frame, timestamp_ms=None):
+        """Returns (landmarks, estimated) for one camera frame; estimated is False for detected frames."""
+        if timestamp_ms is None:
+            timestamp_ms = time.monotonic() * 1000
+        self.frames += 1
+
+        if self.latency_budget_ms is not None:
+            # Unused credit is capped, so an idle stretch can't pay for a burst of back-to-back detections
+            self.credit_ms = min(self.credit_ms + self.latency_budget_ms,
+                                 max(self.latency_budget_ms, self.detect_ms or 0.0) * 2)
+
+        if self._should_detect(timestamp_ms):
+            start = time.perf_counter()
+            landmarks = self.detect(frame, timestamp_ms)
+            cost_ms = (time.perf_counter() - start) * 1000
+
+            self.detect_ms = cost_ms if self.detect_ms is None else 0.8 * self.detect_ms + 0.2 * cost_ms
+            if self.latency_budget_ms is not None:
+                self.credit_ms -= cost_ms
+            self.last_detect_ms = timestamp_ms
+            self.detections += 1
+            self._add_detection(timestamp_ms, landmarks)
+            return landmarks, False
+
+        return self.estimate(timestamp_ms), True
+
+    def estimate(self, timestamp_ms):
+        """(33, 4) landmarks at timestamp_ms from the recent detections; NaN rows if there are none."""
+        landmarks = np.full((NUM_LANDMARKS, LANDMARK_FIELDS), np.nan, dtype=np.float32)
+        if self.count == 0:
+            return landmarks
+
+        last_time = self.times[self.count - 1]
+        landmarks[:, 3] = self.poses[self.count - 1, :, 3]
+        if self.count == 1:
+            landmarks[:, :3] = self.poses[0, :, :3]  # Nothing to extrapolate from yet: hold
+            return landmarks
+
+        target = min(max(timestamp_ms, last_time), last_time + self.max_extrapolation_ms)
+        if self.estimator == PCHIP:
+            if self._curve is None:
+                # One PCHIP over every keypoint & coordinate along the time axis, rebuilt once per detection
+                self._curve = PchipInterpolator(self.times[:self.count], self.poses[:self.count, :, :3], axis=0,
+                                                extrapolate=True)
+            landmarks[:, :3] = self._curve(target)
+        else:
+            previous, last = self.poses[self.count - 2, :, :3], self.poses[self.count - 1, :, :3]
+            velocity = (last - previous) / (last_time - self.times[self.count - 2])
+            landmarks[:, :3] = last + velocity * (target - last_time)
+        return landmarks
+
+    def _should_detect(self, timestamp_ms):
+        if timestamp_ms - self.last_detect_ms < self.min_interval_ms:
+            return False
+        if self.latency_budget_ms is None or self.detect_ms is None:
+            return True
+        return self.credit_ms >= self.detect_ms
+
+    def _add_detection(self, timestamp_ms, landmarks):
+        self._curve = None
+        if np.isnan(landmarks[:, 0]).all():
+            self.count = 0  # Pose lost: don't estimate across the gap
+            return
+        if self.count and timestamp_ms <= self.times[self.count - 1]:
+            return  # PCHIP needs strictly increasing times
+        if self.count == len(self.times):
+            self.times[:-1], self.poses[:-1] = self.times[1:], self.poses[1:]
+            self.count -= 1
+        self.times[self.count] = timestamp_ms
+        self.poses[self.count] = landmarks
+        self.count += 1
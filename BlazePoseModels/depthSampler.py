@@ -0,0 +1,106 @@
+import numpy as np
+from landmarkFrame import JOINT_INDEX
+
+DEPTH_WINDOW = 5  # Median over a 5x5 patch around each landmark pixel, ignoring holes (zero depth)
+
+
+def configure_realsense(config, bag_path=None, width=640, height=480, fps=60, depth=True):
+    """Enables color (and depth) on an rs.config, or plays back a recorded .bag instead of the camera.
+
+    A .bag replays every stream it holds in whatever resolution, rate and format it was recorded with
+    (the RealSense Viewer records rgb8 color, often at 30 fps), so no streams are requested for it;
+    read the color format back from the started profile.
+    """
+    import pyrealsense2 as rs
+
+    if bag_path:
+        config.enable_device_from_file(bag_path, repeat_playback=False)
+        return config
+    config.enable_stream(rs.stream.color, width, height, rs.format.bgr8, fps)
+    if depth:
+        config.enable_stream(rs.stream.depth, width, height, rs.format.z16, fps)
+    return config
+
+
+def create_align():
+    """Processing block that reprojects depth onto the color camera, pixel for pixel."""
+    import pyrealsense2 as rs
+
+    return rs.align(rs.stream.color)
+
+
+def aligned_images(frames, align):
+    """(color_image, depth_image) of a frameset with depth aligned to color.
+
+    Both arrays are views on the frames' own buffers (no copy); they keep their frame alive for as
+    long as they are referenced.
+    """
+    frames = align.process(frames)
+    return np.asanyarray(frames.get_color_frame().get_data()), np.asanyarray(frames.get_depth_frame().get_data())
+
+
+class DepthSampler:
+    """Metric depth and camera-space points at the 33 landmark pixels of a color-aligned depth image.
+
+    All landmarks are sampled in one fancy-indexing gather of a (33, window * window) patch, and the
+    median over each patch's valid (non-zero) pixels is taken on the sorted patch, so a frame costs
+    well under a millisecond whatever the resolution.
+    """
+
+    def __init__(self, depth_scale, intrinsics=None, window=DEPTH_WINDOW):
+        self.depth_scale = depth_scale
+        self.intrinsics = intrinsics  # Color stream intrinsics (.fx, .fy, .ppx, .ppy), needed by points()
+        radius = window // 2
+        offsets_y, offsets_x = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+        self.offsets_x = offsets_x.ravel()
+        self.offsets_y = offsets_y.ravel()
+
+    @classmethod
+    def from_profile(cls, profile, window=DEPTH_WINDOW):
+        """Reads the depth scale and color intrinsics from a started pipeline's profile (live or .bag)."""
+        import pyrealsense2 as rs
+
+        depth_scale = profile.get_device().first_depth_sensor().get_depth_scale()
+        intrinsics = profile.get_stream(rs.stream.color).as_video_stream_profile().get_intrinsics()
+        return cls(depth_scale, intrinsics, window)
+
+    def sample(self, depth_image, landmarks):
+        """(33,) float32 depth in meters at each landmark, NaN if off-image, not detected or a hole."""
+        h, w = depth_image.shape
+        pixels = landmarks[:, :2] * (w, h)
+        inside = np.isfinite(pixels).all(axis=1)
+        inside[inside] = (pixels[inside] >= 0).all(axis=1) & (pixels[inside, 0] < w) & (pixels[inside, 1] < h)
+        pixels = np.rint(np.where(inside[:, np.newaxis], pixels, 0)).astype(np.intp)
+
+        xs = np.clip(pixels[:, 0, np.newaxis] + self.offsets_x, 0, w - 1)
+        ys = np.clip(pixels[:, 1, np.newaxis] + self.offsets_y, 0, h - 1)
+        patches = np.sort(depth_image[ys, xs], axis=1)  # Holes (0) sort first
+
+        # Median of each row's valid values, which sit at the end of the sorted row
+        size = patches.shape[1]
+        valid = np.count_nonzero(patches, axis=1)
+        first = size - valid
+        rows = np.arange(len(patches))
+        lower = patches[rows, np.minimum(first + (valid - 1) // 2, size - 1)]
+        upper = patches[rows, np.minimum(first + valid // 2, size - 1)]
+        depth = (lower.astype(np.float32) + upper) * (0.5 * self.depth_scale)
+        depth[(valid == 0) | ~inside] = np.nan
+        return depth
+
+    def points(self, landmarks, depth):
+        """(33, 3) camera-space x, y, z in meters from the landmark pixels and their depth (pinhole model)."""
+        intrinsics = self.intrinsics
+        u = landmarks[:, 0] * intrinsics.width
+        v = landmarks[:, 1] * intrinsics.height
+        return np.stack([(u - intrinsics.ppx) / intrinsics.fx * depth,
+                         (v - intrinsics.ppy) / intrinsics.fy * depth,
+                         depth], axis=1)
+
+
+def yaw_degrees(points):
+    """Body yaw from the shoulders' metric depth difference over their horizontal distance (NaN without both)."""
+    left, right = points[JOINT_INDEX["left_shoulder"]], points[JOINT_INDEX["right_shoulder"]]
+    shoulder_width = abs(right[0] - left[0])
+    if not shoulder_width > 0:  # Also catches NaN
+        return float("nan")
+    return float(np.degrees(np.arctan((right[2] - left[2]) / shoulder_width)))
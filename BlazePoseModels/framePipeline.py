@@ -0,0 +1,136 @@
+import queue
+import threading
+
+DROP_OLDEST = "drop_oldest"  # A full queue discards its oldest item, keeping latency bounded
+BLOCK = "block"              # A full queue makes the producer wait, so no frame is ever lost
+
+_END = object()  # Sentinel sent downstream when capture runs out of frames
+
+
+class StageQueue:
+    """Bounded queue between two pipeline stages with a configurable overflow policy."""
+
+    def __init__(self, maxsize=2, drop_policy=DROP_OLDEST):
+        if drop_policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+
+    def put(self, item, stop_event):
+        """Puts item, dropping the oldest entry or waiting (until stop_event is set) when full."""
+        while not stop_event.is_set():
+            try:
+                if self.drop_policy == DROP_OLDEST:
+                    self.queue.put_nowait(item)
+                else:
+                    self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self.drop_policy == DROP_OLDEST:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        return False
+
+    def put_end(self, stop_event):
+        """Puts the end sentinel; once stopping, room is made for it regardless of the drop policy."""
+        if self.put(_END, stop_event):
+            return
+        while True:
+            try:
+                self.queue.put_nowait(_END)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, stop_event):
+        """Returns the next item, or _END once stop_event is set."""
+        while not stop_event.is_set():
+            try:
+                return self.queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _END
+
+
+class FramePipeline:
+    """Capture -> inference -> render pipeline with one thread per stage and bounded queues in between.
+
+    capture() returns the next frame (or None when the source is exhausted) and runs on its own thread.
+    infer(frame) runs on a second thread. Iterating the pipeline yields (frame, result) pairs on the
+    caller's thread, which is where rendering and cv2.imshow belong. Throughput is bounded by the
+    slowest stage instead of the sum of all stages; with DROP_OLDEST the queues never hold stale frames.
+    """
+
+    def __init__(self, capture, infer, queue_size=2, drop_policy=DROP_OLDEST):
+        self.capture = capture
+        self.infer = infer
+        self.capture_queue = StageQueue(queue_size, drop_policy)
+        self.result_queue = StageQueue(queue_size, drop_policy)
+        self.stop_event = threading.Event()
+        self.error = None
+        self.threads = [
+            threading.Thread(target=self._run_capture, name="capture", daemon=True),
+            threading.Thread(target=self._run_inference, name="inference", daemon=True),
+        ]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def __iter__(self):
+        while True:
+            item = self.result_queue.get(self.stop_event)
+            if item is _END:
+                break
+            yield item
+        if self.error is not None:
+            raise self.error
+
+    @property
+    def dropped_frames(self):
+        return self.capture_queue.dropped + self.result_queue.dropped
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """Signals both worker threads to finish and waits for them."""
+        self.stop_event.set()
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join(timeout=2)
+
+    def _run_capture(self):
+        try:
+            while not self.stop_event.is_set():
+                frame = self.capture()
+                if frame is None:
+                    break
+                self.capture_queue.put(frame, self.stop_event)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.capture_queue.put_end(self.stop_event)
+
+    def _run_inference(self):
+        try:
+            while True:
+                frame = self.capture_queue.get(self.stop_event)
+                if frame is _END:
+                    break
+                self.result_queue.put((frame, self.infer(frame)), self.stop_event)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.result_queue.put_end(self.stop_event)
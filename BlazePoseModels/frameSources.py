@@ -0,0 +1,295 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+import cv2
+import numpy as np
+from depthSampler import configure_realsense, create_align, aligned_images
+
+REAL_TIME = "real_time"  # Replays wait until each frame's recorded time, like the camera delivered it
+FAST = "fast"            # Replays hand out frames as fast as they are read, for throughput benchmarks
+
+REALSENSE = "realsense"
+WEBCAM = "webcam"        # "webcam" or "webcam:<index>"
+
+# Recorded session layout: one directory of append-only files, so a crash keeps every frame written so far
+SESSION_META = "meta.json"
+SESSION_INDEX = "index.bin"
+SESSION_COLOR = "color.bin"  # Concatenated JPEGs
+SESSION_DEPTH = "depth.bin"  # Concatenated 16-bit PNGs (lossless)
+SESSION_INDEX_DTYPE = np.dtype([('timestamp_ms', '<f8'), ('color_offset', '<i8'), ('color_size', '<i8'),
+                                ('depth_offset', '<i8'), ('depth_size', '<i8')])
+
+
+class FrameSource:
+    """A stream of (color_image, depth_image or None, timestamp_ms) frames; read() returns None at the end.
+
+    Sources with depth also expose depth_scale and the color intrinsics (for DepthSampler). read() is
+    called from the capture thread, so it is where decoding, alignment and pacing happen.
+    """
+
+    depth_scale = None
+    intrinsics = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class _Pacer:
+    """Sleeps so frames are handed out at their recorded pace (REAL_TIME), or never (FAST)."""
+
+    def __init__(self, pacing):
+        if pacing not in (REAL_TIME, FAST):
+            raise ValueError(f"Unknown pacing: {pacing}")
+        self.pacing = pacing
+        self.start = None
+
+    def wait(self, timestamp_ms):
+        if self.pacing == FAST:
+            return
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = (now, timestamp_ms)
+        delay = self.start[0] + (timestamp_ms - self.start[1]) / 1000 - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class RealSenseSource(FrameSource):
+    """Live RealSense camera, or a recorded .bag through the same pipeline; depth is aligned to color.
+
+    A .bag plays back with its recorded streams (width, height and fps only apply to the camera), and
+    color recorded as RGB/RGBA/YUYV is converted to BGR like the camera's stream.
+    """
+
+    def __init__(self, bag_path=None, width=640, height=480, fps=60, depth=False, pacing=REAL_TIME,
+                 timeout_ms=5000):
+        import pyrealsense2 as rs
+
+        self.timeout_ms = timeout_ms
+        self.pipeline = rs.pipeline()
+        config = configure_realsense(rs.config(), bag_path, width, height, fps, depth)  # A .bag plays once
+        self.profile = self.pipeline.start(config)
+        if bag_path:
+            # Non-real-time playback waits for the consumer instead of dropping frames
+            self.profile.get_device().as_playback().set_real_time(pacing == REAL_TIME)
+
+        # The camera delivers bgr8 as requested; a .bag keeps the color format it was recorded in
+        conversions = {rs.format.rgb8: cv2.COLOR_RGB2BGR, rs.format.rgba8: cv2.COLOR_RGBA2BGR,
+                       rs.format.bgra8: cv2.COLOR_BGRA2BGR, rs.format.yuyv: cv2.COLOR_YUV2BGR_YUYV}
+        self.color_conversion = conversions.get(self.profile.get_stream(rs.stream.color).format())
+
+        self.align = create_align() if depth else None
+        if depth:
+            self.depth_scale = self.profile.get_device().first_depth_sensor().get_depth_scale()
+            self.intrinsics = self.profile.get_stream(rs.stream.color).as_video_stream_profile().get_intrinsics()
+
+    def read(self):
+        success, frames = self.pipeline.try_wait_for_frames(self.timeout_ms)
+        if not success:
+            return None  # Camera stalled, or the .bag ended
+        if self.align is not None:
+            color_image, depth_image = aligned_images(frames, self.align)
+        else:
+            color_image, depth_image = np.asanyarray(frames.get_color_frame().get_data()), None
+        if self.color_conversion is not None:
+            color_image = cv2.cvtColor(color_image, self.color_conversion)
+        return color_image, depth_image, frames.get_timestamp()
+
+    def close(self):
+        self.pipeline.stop()
+
+
+class WebcamSource(FrameSource):
+    def __init__(self, index=0):
+        self.cap = cv2.VideoCapture(index)
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        return frame, None, time.monotonic() * 1000
+
+    def close(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """Decoded video file, timestamped from its frame rate."""
+
+    def __init__(self, path, pacing=REAL_TIME):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"Cannot open video file: {path}")
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_interval_ms = 1000 / fps if fps > 0 else 1000 / 30
+        self.frame_idx = 0
+        self.pacer = _Pacer(pacing)
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        timestamp_ms = self.frame_idx * self.frame_interval_ms
+        self.frame_idx += 1
+        self.pacer.wait(timestamp_ms)
+        return frame, None, timestamp_ms
+
+    def close(self):
+        self.cap.release()
+
+
+class SessionRecorder:
+    """Writes frames to a recorded session directory: JPEG color, lossless PNG depth, one index record per frame."""
+
+    def __init__(self, path, jpeg_quality=90, depth_scale=None, intrinsics=None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.jpeg_quality = jpeg_quality
+        self.frames = 0
+        self.color_file = open(os.path.join(path, SESSION_COLOR), 'wb')
+        self.depth_file = open(os.path.join(path, SESSION_DEPTH), 'wb')
+        self.index_file = open(os.path.join(path, SESSION_INDEX), 'wb')
+
+        meta = {'version': 1, 'depth_scale': depth_scale}
+        if intrinsics is not None:
+            meta['intrinsics'] = {name: getattr(intrinsics, name) for name in ('width', 'height', 'fx', 'fy', 'ppx', 'ppy')}
+        with open(os.path.join(path, SESSION_META), 'w') as f:
+            json.dump(meta, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, color_image, depth_image=None, timestamp_ms=None):
+        record = np.zeros(1, dtype=SESSION_INDEX_DTYPE)
+        record['timestamp_ms'] = time.monotonic() * 1000 if timestamp_ms is None else timestamp_ms
+
+        ok, encoded = cv2.imencode(".jpg", color_image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise ValueError("Could not encode color frame")
+        record['color_offset'], record['color_size'] = self.color_file.tell(), len(encoded)
+        self.color_file.write(encoded.tobytes())
+
+        if depth_image is not None:
+            ok, encoded = cv2.imencode(".png", depth_image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+            if not ok:
+                raise ValueError("Could not encode depth frame")
+            record['depth_offset'], record['depth_size'] = self.depth_file.tell(), len(encoded)
+            self.depth_file.write(encoded.tobytes())
+
+        # The index record goes last, after the frame data is flushed, so a listed frame is always on disk
+        self.color_file.flush()
+        self.depth_file.flush()
+        self.index_file.write(record.tobytes())
+        self.frames += 1
+
+    def close(self):
+        for f in (self.color_file, self.depth_file, self.index_file):
+            f.close()
+
+
+class SessionSource(FrameSource):
+    """Replays a recorded session directory with its original timestamps."""
+
+    def __init__(self, path, pacing=REAL_TIME):
+        with open(os.path.join(path, SESSION_META)) as f:
+            meta = json.load(f)
+        index_path = os.path.join(path, SESSION_INDEX)
+        # Whole records only, in case the recording was cut off mid-write
+        count = os.path.getsize(index_path) // SESSION_INDEX_DTYPE.itemsize
+        self.index = np.fromfile(index_path, dtype=SESSION_INDEX_DTYPE, count=count)
+        self.color = _map(os.path.join(path, SESSION_COLOR))
+        self.depth = _map(os.path.join(path, SESSION_DEPTH))
+        self.depth_scale = meta.get('depth_scale')
+        if 'intrinsics' in meta:
+            self.intrinsics = SimpleNamespace(**meta['intrinsics'])
+        self.frame_idx = 0
+        self.pacer = _Pacer(pacing)
+
+    def __len__(self):
+        return len(self.index)
+
+    def read(self):
+        if self.frame_idx >= len(self.index):
+            return None
+        record = self.index[self.frame_idx]
+        self.frame_idx += 1
+
+        offset, size = int(record['color_offset']), int(record['color_size'])
+        color_image = cv2.imdecode(self.color[offset:offset + size], cv2.IMREAD_COLOR)
+        depth_image = None
+        if record['depth_size']:
+            offset, size = int(record['depth_offset']), int(record['depth_size'])
+            depth_image = cv2.imdecode(self.depth[offset:offset + size], cv2.IMREAD_UNCHANGED)
+
+        self.pacer.wait(float(record['timestamp_ms']))
+        return color_image, depth_image, float(record['timestamp_ms'])
+
+
+class RecordingSource(FrameSource):
+    """Passes another source's frames through while recording them to a session directory."""
+
+    def __init__(self, source, path, jpeg_quality=90):
+        self.source = source
+        self.depth_scale = source.depth_scale
+        self.intrinsics = source.intrinsics
+        self.recorder = SessionRecorder(path, jpeg_quality, source.depth_scale, source.intrinsics)
+
+    def read(self):
+        frame = self.source.read()
+        if frame is not None:
+            self.recorder.write(*frame)
+        return frame
+
+    def close(self):
+        self.recorder.close()
+        self.source.close()
+
+
+def _map(path):
+    """Read-only byte view of a file (an empty array for missing or empty files)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+
+def open_source(spec=REALSENSE, pacing=REAL_TIME, depth=False, width=640, height=480, fps=60, record_path=None):
+    """Frame source for spec: "realsense", "webcam[:index]", a .bag file, a recorded session directory or a video file.
+
+    Replays (.bag files, sessions and video files) hand out frames at their recorded pace with pacing=REAL_TIME,
+    or as fast as they decode with FAST, for throughput benchmarks; live cameras ignore pacing.
+    With record_path the frames are also recorded there as a session, for replaying later with SessionSource.
+    """
+    if spec == REALSENSE:
+        source = RealSenseSource(None, width, height, fps, depth)
+    elif isinstance(spec, int) or spec.startswith(WEBCAM):
+        source = WebcamSource(spec if isinstance(spec, int) else int(spec.partition(":")[2] or 0))
+    elif spec.lower().endswith(".bag"):
+        source = RealSenseSource(spec, width, height, fps, depth, pacing)
+    elif os.path.isdir(spec):
+        source = SessionSource(spec, pacing)
+    else:
+        source = VideoFileSource(spec, pacing)
+
+    if record_path:
+        source = RecordingSource(source, record_path)
+    return source
@@ -0,0 +1,37 @@
+import cv2
+import numpy as np
+from skeletonRenderer import draw_points
+
+
+class GraphView:
+    """Reusable canvas for the real-time 2D landmark graphs.
+
+    The white background with its axes is rendered once; every frame resets the same canvas buffer
+    with a single np.copyto and plots all points with one draw call, so nothing is allocated per frame.
+    """
+
+    def __init__(self, width, height, margin=50, point_radius=3, point_color=(0, 0, 255)):
+        self.width = width
+        self.height = height
+        self.point_radius = point_radius
+        self.point_color = point_color
+
+        self.background = np.full((height, width, 3), 255, dtype=np.uint8)
+        cv2.line(self.background, (margin, height - margin), (width - margin, height - margin), (0, 0, 0), 2)  # X-axis
+        cv2.line(self.background, (margin, height - margin), (margin, margin), (0, 0, 0), 2)  # Y-axis
+
+        self.canvas = self.background.copy()
+
+    def clear(self):
+        """Resets the canvas to the prerendered background and returns it."""
+        np.copyto(self.canvas, self.background)
+        return self.canvas
+
+    def draw(self, points, radius=None, color=None):
+        """Clears the canvas and plots an (N, 2) array of pixel coordinates; returns the canvas."""
+        self.clear()
+        points = np.asarray(points).reshape(-1, 2)
+        draw_points(self.canvas, points,
+                    self.point_radius if radius is None else radius,
+                    self.point_color if color is None else color)
+        return self.canvas
@@ -1,67 +1,166 @@
-from mediapipe import solutions
-from mediapipe.framework.formats import landmark_pb2
 import numpy as np
 import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
 import os
+import glob
 import cv2
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from poseLandmarker import LazyPoseDetector, DetectorPool, IMAGE, MODEL_ASSET_PATH, landmarks_to_array
+from skeletonRenderer import draw_skeleton
+from landmarkCache import LandmarkCache, DEFAULT_CACHE_DIR, model_digest
 
 
 #Draw Landmarks for each image
 
-def draw_landmarks_on_image(rgb_image, detection_result):
-  pose_landmarks_list = detection_result.pose_landmarks
-  annotated_image = np.copy(rgb_image)
+def draw_landmarks_on_image(image, detection_result, bgr=False):
+  """Draws every detected pose straight into image (no copy) and returns it."""
+  for pose_index in range(len(detection_result.pose_landmarks)):
+    draw_skeleton(image, landmarks_to_array(detection_result, pose_index=pose_index), bgr=bgr)
+  return image
 
-  # Loop through the detected poses to visualize.
-  for idx in range(len(pose_landmarks_list)):
-    pose_landmarks = pose_landmarks_list[idx]
 
-    # Draw the pose landmarks.
-    pose_landmarks_proto = landmark_pb2.NormalizedLandmarkList()
-    pose_landmarks_proto.landmark.extend([
-      landmark_pb2.NormalizedLandmark(x=landmark.x, y=landmark.y, z=landmark.z) for landmark in pose_landmarks
-    ])
-    solutions.drawing_utils.draw_landmarks(
-      annotated_image,
-      pose_landmarks_proto,
-      solutions.pose.POSE_CONNECTIONS,
-      solutions.drawing_styles.get_default_pose_landmarks_style())
-  return annotated_image
+#Create Pos marker; still images have no timeline, so they always use IMAGE mode.
+#The model is only loaded on the first image missing from the landmark cache
+detector = LazyPoseDetector(IMAGE)
 
 
-#Create Pos marker - wget https://path-to-model/pose_landmarker.task -O pose_landmarker.task
-base_options = python.BaseOptions(model_asset_path='pose_landmarker.task')
-options = vision.PoseLandmarkerOptions(
-    base_options=base_options,
-    output_segmentation_masks=True
-)
-detector = vision.PoseLandmarker.create_from_options(options)
 
+output_dir = "Images/Output"
+HEADLESS = False  # True: only extract landmarks to .npz, no annotated image
 
+# An image file, a directory of images or a glob pattern (e.g. "Images/**/*.jpg")
+IMAGE_INPUT = os.path.join("Images", "Input")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
 
-output_dir = "Images/Output"
+# Batch mode: decoding, drawing & encoding run on NUM_WORKERS threads, detection on NUM_DETECTORS landmarkers.
+# OpenCV and MediaPipe release the GIL, so the extra threads keep the cores busy while others wait on a model
+NUM_WORKERS = 2 * (os.cpu_count() or 1)
+NUM_DETECTORS = os.cpu_count() or 1
+
+# Landmarks are cached per image content & model, so re-runs only redraw (or re-save) without inference.
+# All images share one cache entry, however many there are
+USE_LANDMARK_CACHE = True
+LANDMARK_CACHE_DIR = DEFAULT_CACHE_DIR
+
+
+def find_images(image_input):
+    """Sorted image files of a single path, a directory (not recursive) or a glob pattern."""
+    if os.path.isdir(image_input):
+        paths = [os.path.join(image_input, name) for name in os.listdir(image_input)]
+    elif os.path.isfile(image_input):
+        return [image_input]
+    else:
+        paths = glob.glob(image_input, recursive=True)
+    return sorted(path for path in paths if path.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(path))
+
+
+def landmarks_path(image_path):
+    """Where batch mode saves an image's landmarks: next to it, as <name>_landmarks.npz."""
+    return os.path.splitext(image_path)[0] + "_landmarks.npz"
+
+
+def open_image_cache():
+    """The landmark cache entry for this run's images (opened once per run), or None with USE_LANDMARK_CACHE off."""
+    if not USE_LANDMARK_CACHE:
+        return None
+    return LandmarkCache(LANDMARK_CACHE_DIR).open_images(model_digest(MODEL_ASSET_PATH, running_mode=IMAGE))
 
-image_paths = ["Images\Input\Jumper.jpg"]
 
-def process_and_save(image_path, detector, output_dir):
-    image = mp.Image.create_from_file(image_path)
+def detect_image_landmarks(image_path, detector, image=None, cache=None):
+    """(33, 4) landmarks of an image file; a cache hit skips the detector, and decoding when image isn't given.
 
+    image is the already decoded BGR array, if the caller needs one anyway.
+    """
+    if cache is not None:
+        landmarks, key = cache.lookup(image_path)
+        if landmarks is not None:
+            return landmarks
 
+    if image is None:
+        mp_image = mp.Image.create_from_file(image_path)
+    else:
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    landmarks = landmarks_to_array(detector.detect(mp_image))
 
-    detection_result = detector.detect(image)
+    if cache is not None:
+        cache.put(key, landmarks)
+    return landmarks
 
 
+def process_and_save(image_path, detector, output_dir, cache=None):
+    # Decoded as BGR, which doubles as the drawing buffer and is what imwrite expects
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"Cannot read image: {image_path}")
 
+    landmarks = detect_image_landmarks(image_path, detector, image, cache)
+    draw_skeleton(image, landmarks, bgr=True)
 
-    annotated_image = draw_landmarks_on_image(image.numpy_view(), detection_result)
-    
     # Save
     output_path = os.path.join(output_dir, os.path.basename(image_path))
-    cv2.imwrite(output_path, cv2.cvtColor(annotated_image, cv2.COLOR_RGB2BGR))  # Convert to BGR for saving
+    cv2.imwrite(output_path, image)
     print(f"Saved annotated image to: {output_path}")
 
 
-for path in image_paths:
-    process_and_save(path, detector, output_dir)
+def extract_landmarks(image_path, detector, output_dir, cache=None):
+    """Headless mode: saves the image's (1, 33, 4) float32 landmarks (x, y, z, visibility) without drawing."""
+    landmarks = detect_image_landmarks(image_path, detector, cache=cache)[np.newaxis]
+
+    output_path = os.path.join(output_dir, os.path.splitext(os.path.basename(image_path))[0] + "_landmarks.npz")
+    np.savez(output_path, landmarks=landmarks, timestamps_ms=np.zeros(1))
+    print(f"Saved landmarks to: {output_path}")
+
+
+def process_image(image_path, detector, output_dir=None, cache=None):
+    """Batch worker: saves the image's landmarks next to it and, with output_dir, an annotated copy there."""
+    image = None
+    if output_dir is not None:
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Cannot read image: {image_path}")
+
+    landmarks = detect_image_landmarks(image_path, detector, image, cache)
+    np.savez(landmarks_path(image_path), landmarks=landmarks[np.newaxis], timestamps_ms=np.zeros(1))
+
+    if output_dir is not None:
+        draw_skeleton(image, landmarks, bgr=True)
+        cv2.imwrite(os.path.join(output_dir, os.path.basename(image_path)), image)
+
+
+def process_images(image_paths, output_dir=None, num_workers=NUM_WORKERS, num_detectors=NUM_DETECTORS):
+    """Batch mode over many images; output_dir=None only extracts landmarks. Returns the failed paths."""
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    failed = []
+    cache = open_image_cache()
+    with DetectorPool(num_detectors, IMAGE) as detectors, ThreadPoolExecutor(max_workers=num_workers) as pool:
+        futures = {pool.submit(process_image, path, detectors, output_dir, cache): path for path in image_paths}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                future.result()
+            except Exception as e:
+                failed.append(futures[future])
+                print(f"Failed on {futures[future]}: {e}")
+            if done % 100 == 0 or done == len(futures):
+                print(f"Processed {done}/{len(futures)} images.")
+    if cache is not None:
+        cache.close()
+    return failed
+
+
+if __name__ == "__main__":
+    image_paths = find_images(IMAGE_INPUT)
+    print(f"Found {len(image_paths)} images in {IMAGE_INPUT}")
+
+    if len(image_paths) == 1:
+        os.makedirs(output_dir, exist_ok=True)
+        cache = open_image_cache()
+        if HEADLESS:
+            extract_landmarks(image_paths[0], detector, output_dir, cache)
+        else:
+            process_and_save(image_paths[0], detector, output_dir, cache)
+        detector.close()
+        if cache is not None:
+            cache.close()
+    else:
+        process_images(image_paths, None if HEADLESS else output_dir)
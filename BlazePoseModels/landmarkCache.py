@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+from landmarkFrame import NUM_LANDMARKS, LANDMARK_FIELDS
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "athletix", "landmarks")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # Least recently used entries are evicted above this
+
+LANDMARKS_FILE = "landmarks.npy"  # (num_frames, 33, 4) float32, NaN where no pose was found
+VALID_FILE = "valid.npy"          # (num_frames,) bool, frames that have been through the detector
+META_FILE = "meta.json"
+DIGESTS_DIR = "digests"           # Source content hashes memoized by path, size & mtime, one small file each
+IMAGES_PREFIX = "images_"         # Still images: one entry per model holding every image's landmarks
+IMAGE_RECORDS_FILE = "records.bin"
+IMAGE_RECORD_DTYPE = np.dtype([('path_key', 'S32'), ('digest', 'S32'),
+                               ('landmarks', '<f4', (NUM_LANDMARKS, LANDMARK_FIELDS))])
+
+_CHUNK_BYTES = 1 << 20
+
+
+def file_digest(path):
+    """blake2b of a file's content, read in 1 MB chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_digest(model_asset_path=None, **options):
+    """Hash of the model file's content and the detector options that change its output.
+
+    Callables (result callbacks) are ignored; pass solution="pose" etc. for models without an asset file.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    if model_asset_path and os.path.exists(model_asset_path):
+        digest.update(file_digest(model_asset_path).encode())
+    settings = {key: value for key, value in options.items() if not callable(value)}
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class CachedLandmarks:
+    """One cache entry: per-frame landmarks of one source file under one model, memory-mapped.
+
+    Frames are read and written by index, so a run can fill any subset (a worker's frame range,
+    a resumed labeling session) and later runs only detect what is still missing. Several processes
+    may fill disjoint frame ranges inside the entry's length at once. Only a single writer may grow it
+    past that length: the grown files replace the old ones, so a process still mapping those keeps a
+    valid mapping, but its later writes don't reach the grown entry.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.landmarks = np.load(os.path.join(path, LANDMARKS_FILE), mmap_mode='r+')
+        self.valid = np.load(os.path.join(path, VALID_FILE), mmap_mode='r+')
+
+    @classmethod
+    def create(cls, path, num_frames, meta=None):
+        os.makedirs(path, exist_ok=True)
+        num_frames = max(int(num_frames), 1)
+        landmarks = np.lib.format.open_memmap(os.path.join(path, LANDMARKS_FILE), mode='w+', dtype=np.float32,
+                                              shape=(num_frames, NUM_LANDMARKS, LANDMARK_FIELDS))
+        landmarks.fill(np.nan)
+        landmarks.flush()
+        valid = np.lib.format.open_memmap(os.path.join(path, VALID_FILE), mode='w+', dtype=bool, shape=(num_frames,))
+        valid.fill(False)
+        valid.flush()
+        del landmarks, valid
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump(meta or {}, f)
+        return cls(path)
+
+    def __len__(self):
+        return len(self.valid)
+
+    def get(self, frame_idx):
+        """Cached (33, 4) landmarks of frame_idx (NaN rows if no pose was found), or None on a miss."""
+        if frame_idx < len(self.valid) and self.valid[frame_idx]:
+            return self.landmarks[frame_idx]
+        return None
+
+    def put(self, frame_idx, landmarks):
+        """Stores the frame's landmarks; the entry grows when the container under-reported its frame count."""
+        if frame_idx >= len(self.valid):
+            self._grow(max(frame_idx + 1, 2 * len(self.valid)))
+        self.landmarks[frame_idx] = landmarks
+        self.valid[frame_idx] = True  # Written after the landmarks so a valid frame is always complete
+
+    def complete(self, start=0, stop=None):
+        """True if every frame in [start, stop) is cached; never for an empty range (e.g. an unknown frame count)."""
+        return stop is not None and start < stop <= len(self.valid) and bool(self.valid[start:stop].all())
+
+    def flush(self):
+        self.landmarks.flush()
+        self.valid.flush()
+
+    def _grow(self, num_frames):
+        """Copies the entry into larger files that replace the old ones, never truncating a mapped file."""
+        for name, array, empty in ((LANDMARKS_FILE, self.landmarks, np.nan), (VALID_FILE, self.valid, False)):
+            path = os.path.join(self.path, name)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=array.dtype,
+                                              shape=(num_frames,) + array.shape[1:])
+            grown[len(array):] = empty
+            grown[:len(array)] = array
+            grown.flush()
+            del grown
+            os.replace(tmp_path, path)  # Landmarks first, so a valid frame is always complete
+        self.landmarks = np.load(os.path.join(self.path, LANDMARKS_FILE), mmap_mode='r+')
+        self.valid = np.load(os.path.join(self.path, VALID_FILE), mmap_mode='r+')
+
+
+class ImageLandmarkCache:
+    """One cache entry with the landmarks of any number of still images under one model.
+
+    Photo batches would otherwise need a directory of files per image. Here each image is one
+    fixed-size record (path memo key, content digest, landmarks) appended to a single file and
+    loaded into dicts on open. Records are looked up by content digest, so copies and renamed
+    images hit as well. The path memo key (path, size and mtime) skips rehashing unchanged files.
+    Threads may share an instance. Each record is one unbuffered append, so concurrent runs don't
+    interleave their records.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        records_path = os.path.join(path, IMAGE_RECORDS_FILE)
+        self._file = open(records_path, 'ab', buffering=0)
+        size = os.path.getsize(records_path)
+        if size % IMAGE_RECORD_DTYPE.itemsize:
+            size -= size % IMAGE_RECORD_DTYPE.itemsize
+            self._file.truncate(size)  # Drop a record cut off mid-write
+        records = np.fromfile(records_path, dtype=IMAGE_RECORD_DTYPE, count=size // IMAGE_RECORD_DTYPE.itemsize)
+        self.digests = dict(zip(records['path_key'].tolist(), records['digest'].tolist()))
+        self.landmarks = dict(zip(records['digest'].tolist(), records['landmarks']))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def lookup(self, image_path):
+        """(landmarks or None on a miss, key); pass the key to put() after detecting a miss."""
+        stat = os.stat(image_path)
+        memo_key = f"{os.path.abspath(image_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        path_key = hashlib.blake2b(memo_key.encode(), digest_size=16).hexdigest().encode()
+        with self._lock:
+            digest = self.digests.get(path_key)
+        if digest is None:
+            digest = file_digest(image_path).encode()
+
+        key = (path_key, digest)
+        with self._lock:
+            landmarks = self.landmarks.get(digest)
+        if landmarks is not None and path_key not in self.digests:
+            self.put(key, landmarks)  # Remember this path for the copy's landmarks
+        return (None if landmarks is None else np.array(landmarks)), key
+
+    def put(self, key, landmarks):
+        record = np.zeros(1, dtype=IMAGE_RECORD_DTYPE)
+        record['path_key'], record['digest'] = key
+        record['landmarks'] = landmarks
+        with self._lock:
+            self.digests[key[0]] = key[1]
+            self.landmarks[key[1]] = record['landmarks'][0]
+            self._file.write(record.tobytes())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class LandmarkCache:
+    """On-disk landmark cache keyed by source file content, frame index and model/options.
+
+    Re-running the video, image or labeling scripts on the same footage reads landmarks from here
+    instead of running the PoseLandmarker again. Entries are directories under cache_dir; their
+    modification time records the last use and the least recently used are evicted once the cache
+    grows past max_bytes. One instance may be shared by threads (e.g. imageInput's batch mode).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._total_bytes = None  # Running estimate, so a new entry only rescans the cache near the limit
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, DIGESTS_DIR), exist_ok=True)
+
+    def source_digest(self, source_path):
+        """Content hash of source_path; rehashed only when the file's size or mtime changes."""
+        stat = os.stat(source_path)
+        memo_key = f"{os.path.abspath(source_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        memo_path = os.path.join(self.cache_dir, DIGESTS_DIR, hashlib.blake2b(memo_key.encode(), digest_size=16).hexdigest())
+        if os.path.exists(memo_path):
+            with open(memo_path) as f:
+                return f.read()
+
+        digest = file_digest(source_path)
+        tmp_path = f"{memo_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(digest)
+        os.replace(tmp_path, memo_path)
+        return digest
+
+    def open(self, source_path, model_key, num_frames):
+        """Returns the CachedLandmarks entry for (source content, model_key), creating it with num_frames frames."""
+        path = os.path.join(self.cache_dir, f"{self.source_digest(source_path)}_{model_key}")
+        if os.path.exists(os.path.join(path, META_FILE)):
+            entry = CachedLandmarks(path)
+            os.utime(path)  # Marks the entry as recently used
+        else:
+            entry = CachedLandmarks.create(path, num_frames, {'source_path': os.path.abspath(source_path),
+                                                              'model_key': model_key})
+            self._added(path)
+        return entry
+
+    def open_images(self, model_key):
+        """Returns the ImageLandmarkCache entry holding every still image's landmarks under model_key."""
+        path = os.path.join(self.cache_dir, IMAGES_PREFIX + model_key)
+        existed = os.path.exists(path)
+        entry = ImageLandmarkCache(path)
+        if existed:
+            os.utime(path)
+        else:
+            self._added(path)
+        return entry
+
+    def _added(self, path):
+        """Counts a new entry against max_bytes; only a new entry can push the cache over its limit."""
+        size = _entry_bytes(path)
+        with self._lock:
+            if self._total_bytes is not None and self._total_bytes + size <= self.max_bytes:
+                self._total_bytes += size
+                return
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Removes least recently used entries until the cache fits in max_bytes; returns how many went."""
+        with self._lock:
+            entries = []
+            for item in os.scandir(self.cache_dir):
+                if item.is_dir() and item.name != DIGESTS_DIR:
+                    try:
+                        entries.append((item.stat().st_mtime, _entry_bytes(item.path), item.path))
+                    except FileNotFoundError:
+                        pass  # Evicted by another process meanwhile
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+            self._total_bytes = total
+        return removed
+
+
+def _entry_bytes(path):
+    return sum(item.stat().st_size for item in os.scandir(path) if item.is_file())
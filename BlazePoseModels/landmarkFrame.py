@@ -0,0 +1,108 @@
+import numpy as np
+
+NUM_LANDMARKS = 33
+LANDMARK_FIELDS = 4  # x, y, z, visibility
+
+JOINT_NAMES = (
+    "nose", "left_eye_inner", "left_eye", "left_eye_outer", "right_eye_inner", "right_eye", "right_eye_outer",
+    "left_ear", "right_ear", "mouth_left", "mouth_right", "left_shoulder", "right_shoulder", "left_elbow",
+    "right_elbow", "left_wrist", "right_wrist", "left_pinky", "right_pinky", "left_index", "right_index",
+    "left_thumb", "right_thumb", "left_hip", "right_hip", "left_knee", "right_knee", "left_ankle",
+    "right_ankle", "left_heel", "right_heel", "left_foot_index", "right_foot_index",
+)
+JOINT_INDEX = {name: idx for idx, name in enumerate(JOINT_NAMES)}
+
+
+class Rect:
+    def __init__(self, x1, x2, y1, y2):
+        self.x1 = x1
+        self.x2 = x2
+        self.y1 = y1
+        self.y2 = y2
+
+
+def fill_from_landmarks(landmarks, out):
+    """Copies a sequence of landmark objects (.x, .y, .z, .visibility) into an (N, 4) float32 array."""
+    out[:] = [
+        (landmark.x, landmark.y, landmark.z, landmark.visibility if landmark.visibility is not None else np.nan)
+        for landmark in landmarks
+    ]
+    return out
+
+
+class LandmarkFrame:
+    """One pose as a single (33, 4) float32 array of normalized x, y, z and visibility.
+
+    Replaces 33 per-point Python objects: joints are row views (frame.left_shoulder, frame["nose"]),
+    and bounding box, normalization and yaw are computed on the whole array at once. A frame can
+    wrap a row of a preallocated (T, 33, 4) clip, so filling a clip frame by frame needs no copies.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data=None):
+        self.data = np.full((NUM_LANDMARKS, LANDMARK_FIELDS), np.nan, dtype=np.float32) if data is None else data
+
+    @classmethod
+    def from_pose_landmarks(cls, landmarks, out=None):
+        """Builds a frame from mediapipe landmarks (e.g. results.pose_landmarks.landmark), filling out if given."""
+        frame = cls(out)
+        fill_from_landmarks(landmarks, frame.data)
+        return frame
+
+    @classmethod
+    def views(cls, clip):
+        """Wraps every row of a (T, 33, 4) clip array as a LandmarkFrame without copying."""
+        return [cls(row) for row in clip]
+
+    def __getitem__(self, joint):
+        return self.data[JOINT_INDEX[joint] if isinstance(joint, str) else joint]
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def xy(self):
+        return self.data[:, :2]
+
+    @property
+    def z(self):
+        return self.data[:, 2]
+
+    @property
+    def visibility(self):
+        return self.data[:, 3]
+
+    def pixels(self, width, height):
+        """Returns the landmarks as an int32 (33, 2) array of pixel coordinates."""
+        return (self.xy * (width, height)).astype(np.int32)
+
+    def bounding_box(self, width, height):
+        """Pixel-space box around every landmark."""
+        pixels = self.pixels(width, height)
+        x1, y1 = pixels.min(axis=0)
+        x2, y2 = pixels.max(axis=0)
+        return Rect(int(x1), int(x2), int(y1), int(y2))
+
+    def normalized_to(self, rect, width, height, size=625, offset=50):
+        """Maps the pixel-space landmarks inside rect onto a size x size graph area starting at offset."""
+        origin = np.array([rect.x1, rect.y1], dtype=np.float32)
+        extent = np.array([rect.x2 - rect.x1, rect.y2 - rect.y1], dtype=np.float32)
+        extent[extent == 0] = 1  # A degenerate box collapses onto the offset instead of dividing by zero
+        return ((self.pixels(width, height) - origin) / extent * size).astype(np.int32) + offset
+
+    def yaw_degrees(self):
+        """Body yaw from the shoulders: arctan of their depth difference over their horizontal distance."""
+        left, right = self.data[JOINT_INDEX["left_shoulder"]], self.data[JOINT_INDEX["right_shoulder"]]
+        shoulder_width = abs(right[0] - left[0])
+        if shoulder_width > 0:  # Avoid division by zero
+            return float(np.degrees(np.arctan((right[2] - left[2]) / shoulder_width)))
+        return 0.0  # No valid shoulder width detected
+
+
+def _joint_property(idx):
+    return property(lambda self: self.data[idx], doc=f"Row view of landmark {idx} ({JOINT_NAMES[idx]}).")
+
+
+for _idx, _name in enumerate(JOINT_NAMES):
+    setattr(LandmarkFrame, _name, _joint_property(_idx))
@@ -0,0 +1,200 @@
+import queue
+import threading
+import time
+import numpy as np
+from mediapipe.tasks import python
+from mediapipe.tasks.python import vision
+from landmarkFrame import NUM_LANDMARKS, LANDMARK_FIELDS, fill_from_landmarks
+
+#Pose landmarker model - wget https://path-to-model/pose_landmarker.task -O pose_landmarker.task
+MODEL_ASSET_PATH = 'pose_landmarker.task'
+
+IMAGE = "image"               # Independent detection on every call (detector.detect)
+VIDEO = "video"               # Decoded files: cross-frame tracking with detect_for_video
+LIVE_STREAM = "live_stream"   # Cameras: non-blocking detect_async, results arrive on a callback
+
+# Switch running modes for every script from here
+FILE_RUNNING_MODE = VIDEO
+LIVE_RUNNING_MODE = LIVE_STREAM
+
+_RUNNING_MODES = {
+    IMAGE: vision.RunningMode.IMAGE,
+    VIDEO: vision.RunningMode.VIDEO,
+    LIVE_STREAM: vision.RunningMode.LIVE_STREAM,
+}
+
+EMPTY_RESULT = vision.PoseLandmarkerResult(pose_landmarks=[], pose_world_landmarks=[])
+
+# LIVE_STREAM frames whose result is still pending keep their context (e.g. the camera frame) alive this long;
+# camera SDKs recycle a small pool of frame buffers, so only the few frames actually in flight are held
+MAX_PENDING_CONTEXTS = 4
+
+
+def landmarks_to_array(detection_result, out=None, pose_index=0):
+    """Copies detected pose pose_index into a (33, 4) float32 array of (x, y, z, visibility).
+
+    Rows are NaN when no pose was found. Pass out (e.g. one row of a preallocated (T, 33, 4) clip)
+    to fill it in place.
+    """
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, LANDMARK_FIELDS), dtype=np.float32)
+
+    if len(detection_result.pose_landmarks) <= pose_index:
+        out.fill(np.nan)
+        return out
+
+    return fill_from_landmarks(detection_result.pose_landmarks[pose_index], out)
+
+
+class PoseDetector:
+    """PoseLandmarker with one detect(image, timestamp_ms) call for every running mode.
+
+    VIDEO and LIVE_STREAM let MediaPipe track the pose between frames instead of running a full
+    detection each time; they need strictly increasing timestamps, which are taken from a monotonic
+    clock when none are given. In LIVE_STREAM mode detect() only queues the frame and returns the most
+    recent finished result (EMPTY_RESULT until the first one arrives), so capture never waits on inference.
+    That result belongs to an earlier frame: use detect_async() to get it together with that frame.
+    Segmentation masks cost a full-resolution float image per frame and nothing reads them, so they
+    are off unless output_segmentation_masks is set.
+    """
+
+    def __init__(self, running_mode=IMAGE, model_asset_path=MODEL_ASSET_PATH, output_segmentation_masks=False,
+                 result_callback=None, **options):
+        if running_mode not in _RUNNING_MODES:
+            raise ValueError(f"Unknown running mode: {running_mode}")
+
+        self.running_mode = running_mode
+        self.result_callback = result_callback
+        self.latest_result = EMPTY_RESULT
+        self.latest_timestamp_ms = None
+        self.latest_image = None    # The mp.Image the latest result was computed on
+        self.latest_context = None
+        self._pending_contexts = {}
+        self._lock = threading.Lock()
+        self._last_timestamp_ms = -1
+
+        if running_mode == LIVE_STREAM:
+            options['result_callback'] = self._on_result
+
+        self.options = vision.PoseLandmarkerOptions(
+            base_options=python.BaseOptions(model_asset_path=model_asset_path),
+            running_mode=_RUNNING_MODES[running_mode],
+            output_segmentation_masks=output_segmentation_masks,
+            **options
+        )
+        self.landmarker = vision.PoseLandmarker.create_from_options(self.options)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def detect(self, image, timestamp_ms=None):
+        """Runs pose detection on an mp.Image and returns a PoseLandmarkerResult."""
+        if self.running_mode == IMAGE:
+            return self.landmarker.detect(image)
+
+        if self.running_mode == VIDEO:
+            return self.landmarker.detect_for_video(image, self._next_timestamp(timestamp_ms))
+
+        return self.detect_async(image, timestamp_ms)[0]
+
+    def detect_async(self, image, timestamp_ms=None, context=None):
+        """LIVE_STREAM: queues image and returns the latest finished (result, timestamp_ms, context).
+
+        context is any object to pair with this frame's result, e.g. the color and depth images it was
+        taken from, so callers draw and measure a result on its own frame rather than the current one.
+        Until the first result arrives this returns (EMPTY_RESULT, None, None).
+        """
+        timestamp_ms = self._next_timestamp(timestamp_ms)
+        with self._lock:
+            self._pending_contexts[timestamp_ms] = context
+            # Frames MediaPipe dropped while busy never get a result. The oldest pending frame is the one in
+            # flight, so forget the ones queued after it
+            while len(self._pending_contexts) > MAX_PENDING_CONTEXTS:
+                timestamps = iter(self._pending_contexts)
+                next(timestamps)
+                del self._pending_contexts[next(timestamps)]
+        self.landmarker.detect_async(image, timestamp_ms)
+        with self._lock:
+            return self.latest_result, self.latest_timestamp_ms, self.latest_context
+
+    def close(self):
+        self.landmarker.close()
+
+    def _next_timestamp(self, timestamp_ms):
+        if timestamp_ms is None:
+            timestamp_ms = time.monotonic() * 1000
+        # MediaPipe rejects timestamps that do not strictly increase
+        timestamp_ms = max(int(timestamp_ms), self._last_timestamp_ms + 1)
+        self._last_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        with self._lock:
+            self.latest_result = result
+            self.latest_timestamp_ms = timestamp_ms
+            self.latest_image = output_image
+            self.latest_context = self._pending_contexts.pop(timestamp_ms, None)
+            # Results arrive in timestamp order, so earlier pending frames were dropped
+            for pending_ms in [t for t in self._pending_contexts if t < timestamp_ms]:
+                del self._pending_contexts[pending_ms]
+        if self.result_callback is not None:
+            self.result_callback(result, output_image, timestamp_ms)
+
+
+class LazyPoseDetector:
+    """PoseDetector that loads the model on the first detect() call, so fully cached runs never create it."""
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.detector = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def detect(self, image, timestamp_ms=None):
+        if self.detector is None:
+            self.detector = PoseDetector(*self.args, **self.kwargs)
+        return self.detector.detect(image, timestamp_ms)
+
+    def close(self):
+        if self.detector is not None:
+            self.detector.close()
+
+
+class DetectorPool:
+    """A fixed set of lazily created PoseDetectors shared by worker threads.
+
+    A PoseLandmarker must not run two detections at once, so detect() borrows an idle detector for
+    the call. Threads beyond the pool size meanwhile decode and encode instead of holding a model,
+    and only as many models are loaded as detections ever ran concurrently.
+    """
+
+    def __init__(self, size, *args, **kwargs):
+        self.detectors = [LazyPoseDetector(*args, **kwargs) for _ in range(max(int(size), 1))]
+        self._idle = queue.LifoQueue()  # Reuses warm detectors before loading another
+        for detector in self.detectors:
+            self._idle.put(detector)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def detect(self, image, timestamp_ms=None):
+        detector = self._idle.get()
+        try:
+            return detector.detect(image, timestamp_ms)
+        finally:
+            self._idle.put(detector)
+
+    def close(self):
+        for detector in self.detectors:
+            detector.close()
@@ -0,0 +1,141 @@
+import queue
+import threading
+import cv2
+import numpy as np
+
+PREFETCH_BUFFERS = 8  # Frames decoded ahead of the consumer
+MIN_BUFFERS = 2       # One slot held by the consumer, one being decoded
+PREFETCH_MAX_BYTES = 256 * 1024 ** 2  # Ring memory cap; 4K frames get fewer slots than 720p ones
+
+
+class PrefetchDecoder:
+    """Decodes a video file on a background thread into a ring of preallocated frame buffers.
+
+    OpenCV releases the GIL while decoding, so decoding the next frames overlaps with whatever the
+    consumer (pose inference) does with the current one. The optional downscale and BGR->RGB
+    conversion also happen on the decoder thread, written straight into the ring slots. Only the
+    frames [start_frame, end_frame) are decoded, so a worker process can prefetch just its range.
+
+    read() returns (frame_idx, bgr, rgb) with views on a ring slot (None for a disabled output). A slot
+    is handed back to the decoder on the next read(), so copy a frame to keep it longer. The ring gets
+    fewer slots when they would exceed max_bytes (but never fewer than MIN_BUFFERS).
+    """
+
+    def __init__(self, path, start_frame=0, end_frame=None, buffers=PREFETCH_BUFFERS, bgr=True, rgb=False, scale=None,
+                 max_bytes=PREFETCH_MAX_BYTES):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"Cannot open video file: {path}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.source_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.source_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.scale = scale if scale and scale != 1 else None
+        self.width = max(int(round(self.source_width * (self.scale or 1))), 1)
+        self.height = max(int(round(self.source_height * (self.scale or 1))), 1)
+
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        if start_frame:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        slot_bytes = self.height * self.width * 3 * (bool(bgr) + bool(rgb))
+        if max_bytes is not None and slot_bytes:
+            buffers = min(buffers, max_bytes // slot_bytes)
+        buffers = max(buffers, MIN_BUFFERS)
+        shape = (buffers, self.height, self.width, 3)
+        self.bgr_buffers = np.empty(shape, dtype=np.uint8) if bgr else None
+        self.rgb_buffers = np.empty(shape, dtype=np.uint8) if rgb else None
+        self._free = queue.Queue()
+        for slot in range(buffers):
+            self._free.put(slot)
+        self._ready = queue.Queue()
+        self._held = None
+        self._stop = threading.Event()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="decoder", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def read(self):
+        """Next (frame_idx, bgr, rgb), or None at the end of the range."""
+        if self._held is not None:
+            self._free.put(self._held)
+            self._held = None
+
+        item = self._ready.get()
+        if item is None:
+            self._ready.put(None)  # Keep answering None on further reads
+            if self.error is not None:
+                raise self.error
+            return None
+
+        frame_idx, slot = item
+        self._held = slot
+        bgr = self.bgr_buffers[slot] if self.bgr_buffers is not None else None
+        rgb = self.rgb_buffers[slot] if self.rgb_buffers is not None else None
+        return frame_idx, bgr, rgb
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.cap.release()
+
+    def _run(self):
+        frame_idx = self.start_frame
+        # Decoded (and resized) frames only need buffers outside the ring when they aren't the BGR output
+        scratch = resized_scratch = None
+        if self.scale is not None or self.bgr_buffers is None:
+            scratch = np.empty((self.source_height, self.source_width, 3), dtype=np.uint8)
+        if self.scale is not None and self.bgr_buffers is None:
+            resized_scratch = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+        try:
+            while self.end_frame is None or frame_idx < self.end_frame:
+                slot = self._next_free_slot()
+                if slot is None:
+                    break
+
+                target = scratch if scratch is not None else self.bgr_buffers[slot]
+                ret, decoded = self.cap.read(target)
+                if not ret:
+                    self._free.put(slot)
+                    break
+                if decoded.shape != (self.source_height, self.source_width, 3):
+                    raise ValueError(f"Frame {frame_idx} is {decoded.shape}, expected "
+                                     f"{(self.source_height, self.source_width, 3)}")
+
+                if self.scale is not None:
+                    resized = self.bgr_buffers[slot] if self.bgr_buffers is not None else resized_scratch
+                    cv2.resize(decoded, (self.width, self.height), dst=resized, interpolation=cv2.INTER_AREA)
+                    decoded = resized
+                if self.rgb_buffers is not None:
+                    cv2.cvtColor(decoded, cv2.COLOR_BGR2RGB, dst=self.rgb_buffers[slot])
+
+                self._ready.put((frame_idx, slot))
+                frame_idx += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self._ready.put(None)
+
+    def _next_free_slot(self):
+        while not self._stop.is_set():
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
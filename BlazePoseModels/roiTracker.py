@@ -0,0 +1,127 @@
+import cv2
+import mediapipe as mp
+import numpy as np
+from landmarkFrame import LandmarkFrame
+from poseLandmarker import landmarks_to_array
+
+ROI_MARGIN = 0.25     # The previous pose's box grows by this fraction of its size on every side
+ROI_SIZE = 256        # Side of the square crop handed to the detector (the landmark model's input size)
+MIN_VISIBLE = 15      # Fewer landmarks above VISIBLE_THRESHOLD means tracking is lost
+VISIBLE_THRESHOLD = 0.5
+
+
+class RoiTracker:
+    """Runs the detector on a crop around the previous frame's pose instead of on the full frame.
+
+    Each frame is cut to the last pose's bounding box plus a margin, squared up and downscaled to
+    input_size x input_size before any color conversion, and the landmarks are mapped back to
+    full-frame normalized coordinates. On 1080p/4K footage only the crop is ever converted and handed
+    to MediaPipe, instead of the full frame being converted, copied and resized. When no pose (or too
+    few visible landmarks) is found in the crop, the same frame is searched again at full resolution.
+
+    Crops follow the athlete, so consecutive crops keep the pose in about the same place and a VIDEO
+    mode detector keeps tracking inside them. Full-frame searches go to search_detector (the same
+    detector by default) so the two image streams don't share tracking state.
+    """
+
+    def __init__(self, detector, margin=ROI_MARGIN, input_size=ROI_SIZE, min_visible=MIN_VISIBLE,
+                 search_detector=None):
+        self.detector = detector
+        self.search_detector = search_detector if search_detector is not None else detector
+        self.margin = margin
+        self.input_size = input_size
+        self.min_visible = min_visible
+        self.roi = None  # Rect of the last pose in full-frame pixels, None until one is found
+        self.crop = np.zeros((input_size, input_size, 3), dtype=np.uint8)
+        self.tracked_frames = 0
+        self.full_frame_searches = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def reset(self):
+        self.roi = None
+
+    def detect(self, frame, timestamp_ms=None, bgr=True):
+        """(33, 4) landmarks of frame in full-frame normalized coordinates, NaN rows if no pose was found."""
+        h, w = frame.shape[:2]
+        if self.roi is not None:
+            mapping = self._crop(frame, self.roi)
+            if mapping is not None:
+                landmarks = self._run(self.detector, self._to_rgb(self.crop, bgr), timestamp_ms)
+                if self._found(landmarks):
+                    self._to_frame(landmarks, mapping, w, h)
+                    self.tracked_frames += 1
+                    self._update_roi(landmarks, w, h)
+                    return landmarks
+
+        # Tracking lost (or never started): search the whole frame
+        self.full_frame_searches += 1
+        landmarks = self._run(self.search_detector, self._to_rgb(frame, bgr), timestamp_ms)
+        self._update_roi(landmarks, w, h)
+        return landmarks
+
+    def close(self):
+        self.detector.close()
+        if self.search_detector is not self.detector:
+            self.search_detector.close()
+
+    @staticmethod
+    def _run(detector, rgb, timestamp_ms):
+        return landmarks_to_array(detector.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb), timestamp_ms))
+
+    @staticmethod
+    def _to_rgb(image, bgr):
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB) if bgr else np.ascontiguousarray(image)
+
+    def _found(self, landmarks):
+        return np.count_nonzero(landmarks[:, 3] > VISIBLE_THRESHOLD) >= self.min_visible
+
+    def _update_roi(self, landmarks, w, h):
+        self.roi = LandmarkFrame(landmarks).bounding_box(w, h) if self._found(landmarks) else None
+
+    def _crop(self, frame, roi):
+        """Fills self.crop with the square around roi (zero padded past the frame edges).
+
+        Returns the per-axis (offset, scale) that maps crop pixels back to frame pixels, or None when
+        the square would cover the whole frame anyway.
+        """
+        h, w = frame.shape[:2]
+        side = max(roi.x2 - roi.x1, roi.y2 - roi.y1) * (1 + 2 * self.margin)
+        if side >= max(w, h) or side < 1:
+            return None
+        left, top = (roi.x1 + roi.x2 - side) / 2, (roi.y1 + roi.y2 - side) / 2
+        scale = self.input_size / side
+
+        # The whole frame pixels covering the square's part inside the frame, and where they land in the crop.
+        # Flooring keeps x1 - left >= 0, so the crop window never starts before the crop's first pixel
+        x1, y1 = max(int(np.floor(left)), 0), max(int(np.floor(top)), 0)
+        x2, y2 = min(int(np.ceil(left + side)), w), min(int(np.ceil(top + side)), h)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        cx1, cy1 = max(int(round((x1 - left) * scale)), 0), max(int(round((y1 - top) * scale)), 0)
+        cx2, cy2 = min(int(round((x2 - left) * scale)), self.input_size), min(int(round((y2 - top) * scale)), self.input_size)
+        if cx2 <= cx1 or cy2 <= cy1:
+            return None
+
+        self.crop.fill(0)
+        # INTER_AREA averages the source pixels, so heavy 4K downscales don't alias
+        self.crop[cy1:cy2, cx1:cx2] = cv2.resize(frame[y1:y2, x1:x2], (cx2 - cx1, cy2 - cy1),
+                                                 interpolation=cv2.INTER_AREA)
+
+        # Exact inverse of the resize actually done: crop pixel c -> frame pixel x1 + (c - cx1) * sx
+        sx, sy = (x2 - x1) / (cx2 - cx1), (y2 - y1) / (cy2 - cy1)
+        return (x1 - cx1 * sx, sx), (y1 - cy1 * sy, sy)
+
+    def _to_frame(self, landmarks, mapping, w, h):
+        """Maps crop-normalized landmarks to frame-normalized ones in place."""
+        (ox, sx), (oy, sy) = mapping
+        size = self.input_size
+        landmarks[:, 0] = (ox + landmarks[:, 0] * size * sx) / w
+        landmarks[:, 1] = (oy + landmarks[:, 1] * size * sy) / h
+        landmarks[:, 2] *= size * sx / w  # z shares x's scale
+        return landmarks
+
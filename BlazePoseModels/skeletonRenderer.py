@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+
+# BlazePose 33-landmark topology (same edges as mediapipe's POSE_CONNECTIONS)
+POSE_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+)
+CONNECTION_INDEX = np.array(POSE_CONNECTIONS, dtype=np.intp)  # (35, 2) start/end landmark pairs
+
+LEFT_LANDMARKS = np.array([1, 2, 3, 7, 9, 11, 13, 15, 17, 19, 21, 23, 25, 27, 29, 31])
+RIGHT_LANDMARKS = np.array([4, 5, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24, 26, 28, 30, 32])
+
+# RGB colors matching mediapipe's default pose style
+CONNECTION_COLOR = (224, 224, 224)
+LEFT_COLOR = (255, 138, 0)
+RIGHT_COLOR = (0, 217, 231)
+CENTER_COLOR = (224, 224, 224)
+
+VISIBILITY_THRESHOLD = 0.5  # Same cut-off mediapipe's drawing_utils uses
+
+# Landmark group -> color, drawn with one call per group
+_LANDMARK_GROUPS = (
+    (np.array([0]), CENTER_COLOR),
+    (LEFT_LANDMARKS, LEFT_COLOR),
+    (RIGHT_LANDMARKS, RIGHT_COLOR),
+)
+
+
+def landmarks_to_pixels(landmarks, width, height):
+    """Maps normalized (33, >=2) landmarks to an int32 (33, 2) array of pixel coordinates."""
+    return np.rint(landmarks[:, :2] * (width, height)).astype(np.int32)
+
+
+def draw_points(image, points, radius, color):
+    """Draws filled dots at every (x, y) in points with a single OpenCV call.
+
+    Each point becomes a zero-length polyline whose round caps, at thickness 2 * radius, cover the
+    same pixels as cv2.circle(image, point, radius, color, cv2.FILLED).
+    """
+    if len(points) == 0:
+        return image
+    segments = np.repeat(np.asarray(points, dtype=np.int32)[:, np.newaxis, :], 2, axis=1)
+    cv2.polylines(image, segments, False, color, 2 * radius)
+    return image
+
+
+def _color(color, bgr):
+    return color[::-1] if bgr else color
+
+
+def draw_skeleton(image, landmarks, bgr=False, thickness=None, radius=None,
+                  visibility_threshold=VISIBILITY_THRESHOLD):
+    """Draws one pose straight into image (no copy) and returns it.
+
+    landmarks is a (33, 3) or (33, 4) array of normalized x, y, z[, visibility]; landmarks below
+    visibility_threshold, and the connections touching them, are skipped. All connections go through
+    one cv2.polylines call using the precomputed CONNECTION_INDEX pairs. Set bgr=True when image is
+    BGR so the default colors come out right.
+    """
+    height, width = image.shape[:2]
+    if thickness is None:
+        thickness = max(2, height // 360)
+    if radius is None:
+        radius = max(2, height // 240)
+
+    landmarks = np.asarray(landmarks)
+    if landmarks.shape[1] > 3:
+        visible = landmarks[:, 3] >= visibility_threshold
+    else:
+        visible = np.ones(len(landmarks), dtype=bool)
+    visible &= ~np.isnan(landmarks[:, :2]).any(axis=1)
+
+    pixels = landmarks_to_pixels(np.nan_to_num(landmarks), width, height)
+
+    edges = CONNECTION_INDEX[visible[CONNECTION_INDEX].all(axis=1)]
+    if len(edges):
+        cv2.polylines(image, pixels[edges], False, _color(CONNECTION_COLOR, bgr), thickness)
+
+    for indices, color in _LANDMARK_GROUPS:
+        draw_points(image, pixels[indices[visible[indices]]], radius, _color(color, bgr))
+
+    return image
@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+
+METRIC_PREFIX = "athletix"
+QUANTILES = (50, 95, 99)
+FRAME_STAGE = "frame"  # Time between displayed frames, recorded by tick()
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.stage, time.perf_counter() - self.start)
+
+
+class StageMetrics:
+    """Per-stage latency timers for the live loops.
+
+    Each stage keeps its last `window` durations in a fixed numpy ring, so recording is a lock and one
+    array write, and the p50/p95/p99 are only computed when asked for (overlay, export). Stages may be
+    timed from any thread (capture, inference, render). Totals are kept for Prometheus counters.
+    """
+
+    def __init__(self, window=300, jsonl_path=None, export_interval=1.0):
+        self.window = window
+        self.jsonl_path = jsonl_path
+        self.export_interval = export_interval
+        self.gauges = {}
+        self._rings = {}
+        self._counts = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._last_tick = None
+        self._last_export = time.monotonic()
+        self._summary = {}
+        self._summary_time = 0.0
+
+    def time(self, stage):
+        """Context manager that records how long its block took: `with metrics.time("detect"): ...`."""
+        return _StageTimer(self, stage)
+
+    def timed(self, stage, function):
+        """Wraps function so every call is recorded under stage (e.g. pipeline stage callables)."""
+        def wrapper(*args, **kwargs):
+            with _StageTimer(self, stage):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def record(self, stage, seconds):
+        """Adds one duration (in seconds) to a stage."""
+        with self._lock:
+            ring = self._rings.get(stage)
+            if ring is None:
+                ring = self._rings[stage] = np.empty(self.window, dtype=np.float64)
+                self._counts[stage] = 0
+                self._totals[stage] = 0.0
+            ring[self._counts[stage] % self.window] = seconds * 1000
+            self._counts[stage] += 1
+            self._totals[stage] += seconds
+
+    def set_gauge(self, name, value):
+        """Exports a free-form value, e.g. the pipeline's dropped frame count."""
+        self.gauges[name] = value
+
+    def tick(self):
+        """Marks one displayed frame: records the frame interval and writes JSONL when it is due."""
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            self.record(FRAME_STAGE, now - self._last_tick)
+        self._last_tick = now
+
+        if self.jsonl_path and time.monotonic() - self._last_export >= self.export_interval:
+            self.write_jsonl()
+
+    def summary(self, max_age=0.0):
+        """{stage: {'p50', 'p95', 'p99', 'mean' (ms), 'count'}}; cached for max_age seconds."""
+        now = time.monotonic()
+        if self._summary and now - self._summary_time < max_age:
+            return self._summary
+
+        with self._lock:
+            rings = {stage: ring[:min(self._counts[stage], self.window)].copy() for stage, ring in self._rings.items()}
+            counts = dict(self._counts)
+
+        summary = {}
+        for stage, samples in rings.items():
+            percentiles = np.percentile(samples, QUANTILES)
+            summary[stage] = {f"p{q}": float(value) for q, value in zip(QUANTILES, percentiles)}
+            summary[stage]['mean'] = float(samples.mean())
+            summary[stage]['count'] = counts[stage]
+
+        self._summary, self._summary_time = summary, now
+        return summary
+
+    def fps(self):
+        frame = self.summary(max_age=0.5).get(FRAME_STAGE)
+        return 1000 / frame['mean'] if frame and frame['mean'] > 0 else 0.0
+
+    def draw_overlay(self, image, origin=(10, 20), color=(0, 255, 0), scale=0.5):
+        """Writes FPS and per-stage p50/p95/p99 onto image in place; percentiles refresh twice a second."""
+        summary = self.summary(max_age=0.5)
+        x, y = origin
+        lines = [f"FPS {self.fps():.1f}"]
+        lines += [f"{stage:<8} p50 {stats['p50']:6.1f}  p95 {stats['p95']:6.1f}  p99 {stats['p99']:6.1f} ms"
+                  for stage, stats in summary.items() if stage != FRAME_STAGE]
+        lines += [f"{name} {value}" for name, value in self.gauges.items()]
+        for line in lines:
+            cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, scale, color, 1, cv2.LINE_AA)
+            y += int(30 * scale) + 6
+        return image
+
+    def prometheus_text(self):
+        """Current metrics in the Prometheus text exposition format."""
+        summary = self.summary()
+        with self._lock:
+            totals = dict(self._totals)
+
+        name = f"{METRIC_PREFIX}_stage_latency_seconds"
+        lines = [f"# HELP {name} Per-stage latency over the last {self.window} frames.", f"# TYPE {name} summary"]
+        for stage, stats in summary.items():
+            for q in QUANTILES:
+                lines.append(f'{name}{{stage="{stage}",quantile="{q / 100}"}} {stats[f"p{q}"] / 1000:.6g}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {totals[stage]:.6g}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+
+        lines += [f"# TYPE {METRIC_PREFIX}_fps gauge", f"{METRIC_PREFIX}_fps {self.fps():.3f}"]
+        for gauge, value in self.gauges.items():
+            lines += [f"# TYPE {METRIC_PREFIX}_{gauge} gauge", f"{METRIC_PREFIX}_{gauge} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write_jsonl(self, path=None):
+        """Appends one JSON line with a timestamp, the FPS, gauges and every stage's summary."""
+        self._last_export = time.monotonic()
+        record = {'time': time.time(), 'fps': self.fps(), 'gauges': self.gauges, 'stages': self.summary()}
+        with open(path or self.jsonl_path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+
+    def serve_prometheus(self, port=9100, host="0.0.0.0"):
+        """Serves prometheus_text() at http://host:port/metrics from a daemon thread; returns the server."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -1,61 +1,189 @@
-from mediapipe import solutions
-from mediapipe.framework.formats import landmark_pb2
 import numpy as np
 import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
 import os
+import tempfile
 import cv2
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from poseLandmarker import (LazyPoseDetector, FILE_RUNNING_MODE, MODEL_ASSET_PATH, NUM_LANDMARKS,
+                            LANDMARK_FIELDS, landmarks_to_array)
+from skeletonRenderer import draw_skeleton
+from landmarkCache import LandmarkCache, CachedLandmarks, DEFAULT_CACHE_DIR, model_digest
+from roiTracker import RoiTracker, ROI_MARGIN, ROI_SIZE
+from prefetchDecoder import PrefetchDecoder, PREFETCH_BUFFERS
 
 
 #Draw Landmarks for each image
 
-def draw_landmarks_on_image(rgb_image, detection_result):
-  pose_landmarks_list = detection_result.pose_landmarks
-  annotated_image = np.copy(rgb_image)
+def draw_landmarks_on_image(image, detection_result, bgr=False):
+  """Draws every detected pose straight into image (no copy) and returns it."""
+  for pose_index in range(len(detection_result.pose_landmarks)):
+    draw_skeleton(image, landmarks_to_array(detection_result, pose_index=pose_index), bgr=bgr)
+  return image
 
-  # Loop through the detected poses to visualize.
-  for idx in range(len(pose_landmarks_list)):
-    pose_landmarks = pose_landmarks_list[idx]
 
-    # Draw the pose landmarks.
-    pose_landmarks_proto = landmark_pb2.NormalizedLandmarkList()
-    pose_landmarks_proto.landmark.extend([
-      landmark_pb2.NormalizedLandmark(x=landmark.x, y=landmark.y, z=landmark.z) for landmark in pose_landmarks
-    ])
-    solutions.drawing_utils.draw_landmarks(
-      annotated_image,
-      pose_landmarks_proto,
-      solutions.pose.POSE_CONNECTIONS,
-      solutions.drawing_styles.get_default_pose_landmarks_style())
-  return annotated_image
+#Pos markers are created per call (and per worker process), so importing this module stays cheap
+NUM_WORKERS = os.cpu_count()  # Worker processes for split_and_process_video; 1 processes in series
+CHUNK_FRAMES = 300            # Frames per worker task in the parallel mode (fewer for large frames, see below)
+MIN_CHUNK_FRAMES = 30         # Shorter ranges restart VIDEO mode tracking too often
+# Uncompressed annotated frames the parallel mode keeps in temporary segments at once; ranges are shortened
+# (and fewer kept in flight) so high-resolution footage stays within it
+TEMP_SEGMENT_BYTES = 4 * 1024 ** 3
+HEADLESS = False              # True: only extract landmarks to .npz, no annotated video
 
+# Landmarks are cached per video content & model, so re-runs only redraw (or re-save) without inference
+USE_LANDMARK_CACHE = True
+LANDMARK_CACHE_DIR = DEFAULT_CACHE_DIR
 
-#Create Pos marker
-base_options = python.BaseOptions(model_asset_path='pose_landmarker.task')
-options = vision.PoseLandmarkerOptions(
-    base_options=base_options,
-    output_segmentation_masks=True
-)
-detector = vision.PoseLandmarker.create_from_options(options)
+# ROI tracking: detect on a small crop around the previous frame's pose instead of the full frame,
+# falling back to a full-frame search when the athlete is lost. It saves converting (and MediaPipe
+# copying and resizing) the full frame, so it only pays off on 1080p/4K footage
+ROI_TRACKING = False
 
+# Frames decoded ahead on a background thread (with their RGB conversion), so decoding overlaps inference.
+# Inference is the slower stage, so a few frames ahead is enough; large frames get fewer within the byte cap
+DECODE_BUFFERS = PREFETCH_BUFFERS
+DECODE_BUFFER_BYTES = 128 * 1024 ** 2
+WORKER_DECODE_BUFFERS = 2  # Per worker process in the parallel mode, where every worker holds its own ring
 
 
+def create_detector():
+    """A fresh, lazily loaded detector for one pass over (a range of) a video."""
+    if ROI_TRACKING:
+        # Crops and full-frame searches each keep their own VIDEO mode tracking
+        return RoiTracker(LazyPoseDetector(FILE_RUNNING_MODE), ROI_MARGIN, ROI_SIZE,
+                          search_detector=LazyPoseDetector(FILE_RUNNING_MODE))
+    return LazyPoseDetector(FILE_RUNNING_MODE)
 
-def process_frame(frame):
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
 
-    detection_result = detector.detect(mp_image)
+def open_decoder(input_path, start_frame=0, end_frame=None, bgr=True, buffers=DECODE_BUFFERS):
+    """Prefetching decoder for [start_frame, end_frame); it also converts to RGB unless ROI tracking crops BGR."""
+    return PrefetchDecoder(input_path, start_frame, end_frame, buffers, bgr=bgr or ROI_TRACKING,
+                           rgb=not ROI_TRACKING, max_bytes=DECODE_BUFFER_BYTES)
 
-    annotated_image = draw_landmarks_on_image(mp_image.numpy_view(), detection_result)
-  
-  
-    return cv2.cvtColor(annotated_image, cv2.COLOR_RGB2BGR)
 
+def open_landmark_cache(input_path, total_frames, chunk_frames=None):
+    """This video's cache entry for the file-mode detector, or None with USE_LANDMARK_CACHE off.
 
+    Tracking restarts at every chunk_frames range in the parallel mode (None: one serial pass), which
+    changes the landmarks, so serial and chunked runs are cached separately.
+    """
+    if not USE_LANDMARK_CACHE:
+        return None
+    options = {'running_mode': FILE_RUNNING_MODE, 'chunk_frames': chunk_frames}
+    if ROI_TRACKING:
+        options.update(roi_margin=ROI_MARGIN, roi_size=ROI_SIZE)
+    return LandmarkCache(LANDMARK_CACHE_DIR).open(input_path, model_digest(MODEL_ASSET_PATH, **options), total_frames)
 
-def split_and_process_video(input_path, output_path, output_fps=30):
+
+def parallel_chunk_frames(chunk_frames, num_workers, frame_bytes, budget_bytes=TEMP_SEGMENT_BYTES):
+    """Frames per worker range: chunk_frames, shortened so two ranges per worker fit in budget_bytes."""
+    return min(chunk_frames, max(MIN_CHUNK_FRAMES, budget_bytes // (2 * num_workers * frame_bytes)))
+
+
+def detect_landmarks(frame, timestamp_ms, detector, cache=None, frame_idx=None, rgb_frame=None):
+    """(33, 4) landmarks of a BGR frame; a cache hit skips the RGB conversion and the detector.
+
+    rgb_frame, if already converted (e.g. by the decoder), is used instead of converting frame.
+    """
+    if cache is not None:
+        landmarks = cache.get(frame_idx)
+        if landmarks is not None:
+            return landmarks
+
+    if isinstance(detector, RoiTracker):
+        landmarks = detector.detect(frame, timestamp_ms)  # Crops before converting, so only the crop is converted
+    else:
+        if rgb_frame is None:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+        landmarks = landmarks_to_array(detector.detect(mp_image, timestamp_ms))
+
+    if cache is not None:
+        cache.put(frame_idx, landmarks)
+    return landmarks
+
+
+def process_frame(frame, timestamp_ms, detector, cache=None, frame_idx=None, rgb_frame=None):
+    landmarks = detect_landmarks(frame, timestamp_ms, detector, cache, frame_idx, rgb_frame)
+
+    # Annotate the decoded BGR frame in place instead of copying the RGB view and converting back
+    return draw_skeleton(frame, landmarks, bgr=True)
+
+
+def process_frame_range(input_path, start_frame, end_frame, frame_interval_ms, segment_path, cache_path=None):
+    """Worker process: annotates frames [start_frame, end_frame) with its own PoseLandmarker.
+
+    With cache_path the worker reads and fills its range of that landmark cache entry.
+
+    The annotated frames go to an uncompressed .npy buffer at segment_path so the parent can hand
+    them to its VideoWriter in order without a second lossy encode. Returns the number of frames written.
+    """
+    decoder = open_decoder(input_path, start_frame, end_frame, buffers=WORKER_DECODE_BUFFERS)
+    segment = np.lib.format.open_memmap(segment_path, mode='w+', dtype=np.uint8,
+                                        shape=(end_frame - start_frame, decoder.height, decoder.width, 3))
+    frame_count = 0
+    cache = CachedLandmarks(cache_path) if cache_path else None
+
+    # Fresh detector per range: VIDEO mode tracking must not jump between unrelated ranges
+    with decoder, create_detector() as detector:
+        for frame_idx, frame, rgb_frame in decoder:
+            segment[frame_count] = process_frame(frame, frame_idx * frame_interval_ms, detector, cache, frame_idx,
+                                                 rgb_frame)
+            frame_count += 1
+
+    segment.flush()
+    if cache is not None:
+        cache.flush()
+    return frame_count
+
+
+def write_ranges_in_order(out, input_path, total_frames, frame_interval_ms, num_workers, chunk_frames, temp_dir,
+                          frame_bytes, cache_path=None, budget_bytes=TEMP_SEGMENT_BYTES):
+    """Farms frame ranges out to worker processes and writes their frames to out in input order.
+
+    Ranges in flight (submitted but not yet written to out) hold at most budget_bytes of temporary
+    segments, whatever the resolution; a single range larger than the budget still runs on its own.
+    Size chunk_frames with parallel_chunk_frames() so the budget fits two ranges per worker.
+    """
+    ranges = [(start, min(start + chunk_frames, total_frames)) for start in range(0, total_frames, chunk_frames)]
+    pending = deque()
+    pending_bytes = 0
+    frame_count = 0
+
+    def write_oldest():
+        nonlocal pending_bytes, frame_count
+        segment_path, range_bytes, future = pending.popleft()
+        written = future.result()
+        segment = np.load(segment_path, mmap_mode='r')
+        for frame in segment[:written]:
+            out.write(np.ascontiguousarray(frame))
+        del segment
+        os.remove(segment_path)
+
+        pending_bytes -= range_bytes
+        frame_count += written
+        print(f"Processed {frame_count}/{total_frames} frames.")
+
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        for range_idx, (start, end) in enumerate(ranges):
+            # Write out the oldest ranges until this one fits in the budget (and at most two per worker are queued)
+            range_bytes = (end - start) * frame_bytes
+            while pending and (pending_bytes + range_bytes > budget_bytes or len(pending) >= 2 * num_workers):
+                write_oldest()
+
+            segment_path = os.path.join(temp_dir, f"segment_{range_idx}.npy")
+            pending.append((segment_path, range_bytes, pool.submit(process_frame_range, input_path, start, end,
+                                                                   frame_interval_ms, segment_path, cache_path)))
+            pending_bytes += range_bytes
+
+        while pending:
+            write_oldest()
+
+    return frame_count
+
+
+def split_and_process_video(input_path, output_path, output_fps=30, num_workers=1, chunk_frames=CHUNK_FRAMES):
     cap = cv2.VideoCapture(input_path)
     if not cap.isOpened():
         print("Error: Cannot open video file.")
@@ -66,39 +194,109 @@ def split_and_process_video(input_path, output_path, output_fps=30):
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = cap.get(cv2.CAP_PROP_FPS)
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()  # Only probed here; frames come from a prefetching decoder (one per worker in parallel mode)
     print(f"Video resolution: {width}x{height}, FPS: {fps}, Total frames: {total_frames}")
+    frame_interval_ms = 1000 / fps if fps > 0 else 1000 / output_fps
 
     # Define the codec and create a VideoWriter object
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # Codec for MP4
     out = cv2.VideoWriter(output_path, fourcc, output_fps, (width, height), isColor=True)
 
-    frame_count = 0
+    # Parallel mode needs a frame count to split on; streams without one are processed in series
+    if num_workers > 1 and total_frames > chunk_frames:
+        frame_bytes = width * height * 3
+        chunk_frames = parallel_chunk_frames(chunk_frames, num_workers, frame_bytes)
+        cache = open_landmark_cache(input_path, total_frames, chunk_frames)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or None) as temp_dir:
+            write_ranges_in_order(out, input_path, total_frames, frame_interval_ms, num_workers, chunk_frames, temp_dir,
+                                  frame_bytes, cache.path if cache is not None else None)
+        out.release()
+        print(f"Finished processing. Output saved to {output_path}")
+        return
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    cache = open_landmark_cache(input_path, total_frames)
+    frame_count = 0
 
-        # Process the frame
-        processed_frame = process_frame(frame)
+    # The model is only loaded if some frame is missing from the cache
+    with open_decoder(input_path) as decoder, create_detector() as detector:
+        for frame_idx, frame, rgb_frame in decoder:
+            # Process the frame (annotated in its decoder slot, which stays ours until the next read)
+            processed_frame = process_frame(frame, frame_idx * frame_interval_ms, detector, cache, frame_idx,
+                                            rgb_frame)
 
-        # Write the processed frame to the output video
-        out.write(processed_frame)
+            # Write the processed frame to the output video
+            out.write(processed_frame)
 
-        frame_count += 1
-        if frame_count % 50 == 0:
-            print(f"Processed {frame_count}/{total_frames} frames.")
+            frame_count += 1
+            if frame_count % 50 == 0:
+                print(f"Processed {frame_count}/{total_frames} frames.")
 
     # Release resources
-    cap.release()
     out.release()
+    if cache is not None:
+        cache.flush()
     print(f"Finished processing. Output saved to {output_path}")
 
 
-input_video = os.path.join("Videos", "input.mp4")  # Replace "input.mp4" with your file name
-output_video = os.path.join("Videos", "output.mp4")  # Name your output file
+def extract_landmarks(input_path, output_path):
+    """Headless mode: saves a (T, 33, 4) float32 landmark array (x, y, z, visibility) and per-frame timestamps.
+
+    Nothing is drawn or encoded, so no frame copies, protobufs or RGB->BGR conversions are paid for.
+    Frames without a detected pose are NaN. The result is written to output_path as an .npz with
+    'landmarks' and 'timestamps_ms' arrays.
+    """
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        print("Error: Cannot open video file.")
+        return
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frame_interval_ms = 1000 / fps if fps > 0 else 1000 / 30
+    cap.release()
+
+    # Everything cached: save straight from the cache without decoding a single frame
+    cache = open_landmark_cache(input_path, total_frames)
+    if cache is not None and cache.complete(0, total_frames):
+        np.savez(output_path, landmarks=np.array(cache.landmarks[:total_frames]),
+                 timestamps_ms=np.arange(total_frames) * frame_interval_ms)
+        print(f"Finished extracting (cached). Landmarks saved to {output_path}")
+        return
+
+    # Preallocate from the container's frame count and grow if it was an underestimate
+    landmarks = np.empty((max(total_frames, 1), NUM_LANDMARKS, LANDMARK_FIELDS), dtype=np.float32)
+    timestamps_ms = np.empty(len(landmarks), dtype=np.float64)
+    frame_count = 0
+
+    # Nothing is drawn, so the decoder only needs to hand out BGR frames for ROI tracking
+    with open_decoder(input_path, bgr=False) as decoder, create_detector() as detector:
+        for frame_idx, frame, rgb_frame in decoder:
+            if frame_count == len(landmarks):
+                landmarks = np.concatenate([landmarks, np.empty_like(landmarks)])
+                timestamps_ms = np.concatenate([timestamps_ms, np.empty_like(timestamps_ms)])
+
+            timestamp_ms = frame_count * frame_interval_ms
+            landmarks[frame_count] = detect_landmarks(frame, timestamp_ms, detector, cache, frame_idx, rgb_frame)
+            timestamps_ms[frame_count] = timestamp_ms
+
+            frame_count += 1
+            if frame_count % 50 == 0:
+                print(f"Extracted {frame_count}/{total_frames} frames.")
+
+    if cache is not None:
+        cache.flush()
+    np.savez(output_path, landmarks=landmarks[:frame_count], timestamps_ms=timestamps_ms[:frame_count])
+    print(f"Finished extracting. Landmarks saved to {output_path}")
+
+
+if __name__ == "__main__":
+    input_video = os.path.join("Videos", "input.mp4")  # Replace "input.mp4" with your file name
+    output_video = os.path.join("Videos", "output.mp4")  # Name your output file
 
-output_path = "Videos/Output/example.mp4"
-input_path = "Videos/Input/tennisPlayer_badView.mp4"
+    output_path = "Videos/Output/example.mp4"
+    input_path = "Videos/Input/tennisPlayer_badView.mp4"
 
-split_and_process_video(input_path, output_path)
+    if HEADLESS:
+        extract_landmarks(input_path, os.path.splitext(output_path)[0] + "_landmarks.npz")
+    else:
+        split_and_process_video(input_path, output_path, num_workers=NUM_WORKERS)
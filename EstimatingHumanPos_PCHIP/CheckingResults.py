@@ -1,11 +1,16 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "St-GCN_Model"))
+from poseDatasetStore import load_pose_dataset
 
 class ClipComparisonVisualizer:
-    def __init__(self, original_dataset_path="pose_dataset.npy", interpolated_dataset_path="pose_dataset_interpolated.npy", keypoint_indices=None):
+    def __init__(self, original_dataset_path="pose_dataset", interpolated_dataset_path="pose_dataset_interpolated", keypoint_indices=None):
         """Loads the original and interpolated datasets."""
-        self.original_dataset = np.load(original_dataset_path, allow_pickle=True).item()
-        self.interpolated_dataset = np.load(interpolated_dataset_path, allow_pickle=True).item()
+        self.original_dataset = load_pose_dataset(original_dataset_path)
+        self.interpolated_dataset = load_pose_dataset(interpolated_dataset_path)
         
         self.original_data = self.original_dataset['data']
         self.interpolated_data = self.interpolated_dataset['data']
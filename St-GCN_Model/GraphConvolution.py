@@ -1,28 +1,84 @@
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+# BlazePose 33-landmark skeleton (mediapipe's POSE_CONNECTIONS). POSE_CONNECTIONS leaves the face and
+# mouth detached from the body, so they are bridged through the nose to keep the graph connected.
+BLAZEPOSE_EDGES = (
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+    (0, 9), (0, 10), (0, 11), (0, 12),
+)
+BLAZEPOSE_CENTER = (23, 24)  # Hips, the body's centre of gravity for the spatial partitions
+
+def hop_distance(num_nodes, edges):
+    """Shortest path length (in edges) between every pair of nodes; unreachable pairs are inf."""
+    A = np.eye(num_nodes, dtype=bool)
+    for i, j in edges:
+        A[i, j] = A[j, i] = True
+
+    hops = np.full((num_nodes, num_nodes), np.inf)
+    reach = np.eye(num_nodes, dtype=bool)
+    for d in range(num_nodes):
+        hops[reach & np.isinf(hops)] = d
+        reach = (reach.astype(np.int64) @ A.astype(np.int64)) > 0
+    return hops
+
+def build_adjacency(num_nodes=33, edges=BLAZEPOSE_EDGES, strategy="uniform", center=BLAZEPOSE_CENTER):
+    """Normalized (K, V, V) adjacency for the skeleton graph.
+
+    "uniform" gives K=1: neighbours and self-loops, column-normalized (A D^-1) as in ST-GCN.
+    "spatial" splits the same entries into K=3 ST-GCN partitions: the root node, neighbours closer
+    to the centre of gravity, and neighbours further away from it.
+    """
+    hops = hop_distance(num_nodes, edges)
+    A = (hops <= 1).astype(np.float32)
+    A = A / A.sum(axis=0, keepdims=True)  # Column-normalize: every node averages its neighbourhood
+
+    if strategy == "uniform":
+        return torch.tensor(A[np.newaxis])
+    if strategy != "spatial":
+        raise ValueError(f"Unknown partition strategy: {strategy}")
+
+    center_dist = hops[:, list(center)].min(axis=1)
+    neighbour = hops <= 1
+    # Entry [j, i] carries node j's features into node i
+    root = neighbour & (center_dist[:, None] == center_dist[None, :])
+    closer = neighbour & (center_dist[:, None] < center_dist[None, :])
+    further = neighbour & (center_dist[:, None] > center_dist[None, :])
+    return torch.tensor(np.stack([A * root, A * closer, A * further]))
+
 class GraphConv(nn.Module):
     def __init__(self, in_channels, out_channels, adjacency_matrix):
         super(GraphConv, self).__init__()
-        self.A = adjacency_matrix
-        self.conv = nn.Conv2d(in_channels, out_channels, kernel_size=(1, 1))
+        # (K, V, V) partitions; a buffer so it follows .to(device) but stays out of the state dict
+        self.register_buffer('A', adjacency_matrix.reshape(-1, *adjacency_matrix.shape[-2:]), persistent=False)
+        self.conv = nn.Conv2d(in_channels * self.A.size(0), out_channels, kernel_size=(1, 1))
+
+    def aggregate(self, x):
+        """Sums neighbours along the node dimension for every partition: (B, C, T, V) -> (B, K*C, T, V)."""
+        b, c, t, v = x.shape
+        return torch.einsum('bctv,kvw->bkctw', x, self.A).reshape(b, self.A.size(0) * c, t, v)
 
     def forward(self, x):
-        # Change einsum to correctly apply adjacency matrix on nodes dimension
-        x = torch.einsum('vw,bctw->bctw', self.A, x)  # Apply graph convolution on nodes
-        x = self.conv(x)
+        # Aggregate first, then mix channels with one 1x1 conv over all partitions;
+        # cheaper than the other way round because in_channels <= out_channels
+        x = self.conv(self.aggregate(x))
         return x
 
 class STGCN(nn.Module):
-    def __init__(self, in_channels=3, num_nodes=33, num_classes=10, num_frames=60):
+    def __init__(self, in_channels=3, num_nodes=33, num_classes=10, num_frames=60, partition_strategy="uniform"):
         super(STGCN, self).__init__()
 
-        self.A = torch.eye(num_nodes)  # Placeholder adjacency matrix
+        A = build_adjacency(num_nodes, strategy=partition_strategy)
         
-        self.graph_conv1 = GraphConv(in_channels, 64, self.A)
-        self.graph_conv2 = GraphConv(64, 128, self.A)
-        self.graph_conv3 = GraphConv(128, 256, self.A)
+        self.graph_conv1 = GraphConv(in_channels, 64, A)
+        self.graph_conv2 = GraphConv(64, 128, A)
+        self.graph_conv3 = GraphConv(128, 256, A)
         
         self.temporal_conv1 = nn.Conv2d(64, 64, kernel_size=(3, 1), padding=(1, 0))
         self.temporal_conv2 = nn.Conv2d(128, 128, kernel_size=(3, 1), padding=(1, 0))
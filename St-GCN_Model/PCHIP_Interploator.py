@@ -1,5 +1,30 @@
 import numpy as np
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from scipy.interpolate import PchipInterpolator
+from poseDatasetStore import load_pose_dataset, write_pose_dataset
+
+
+def resample_clips(clips, target_frames):
+    """Resamples a stack of same-length clips (N, T, keypoints, coords) to target_frames with one PCHIP call."""
+    clips = np.asarray(clips)
+    original_length = clips.shape[1]
+
+    if original_length < 2:
+        return np.repeat(clips, target_frames, axis=1)
+
+    x_old = np.linspace(0, 1, original_length)
+    x_new = np.linspace(0, 1, target_frames)
+
+    # PCHIP treats every keypoint & coordinate of every clip as its own curve along the time axis
+    return PchipInterpolator(x_old, clips, axis=1)(x_new)
+
+
+def _resample_chunk(args):
+    """Process pool entry point: resamples one chunk of same-length clips."""
+    clips, target_frames = args
+    return resample_clips(clips, target_frames)
+
 
 class PCHIPInterpolator:
     def __init__(self, dataset_path, target_frames):
@@ -10,48 +35,61 @@ class PCHIPInterpolator:
         self.interpolated_labels = []
     
     def load_dataset(self):
-        """Loads the dataset from a .npy file."""
+        """Loads the dataset from a store directory or a legacy .npy file."""
         try:
-            return np.load(self.dataset_path, allow_pickle=True).item()
+            return load_pose_dataset(self.dataset_path)
         except FileNotFoundError:
             print(f"Dataset not found at {self.dataset_path}")
             return None
     
     def interpolate_sample(self, sample):
         """Interpolates a single sample using PCHIP to reach target_frames."""
-        original_length = sample.shape[0]
-        
-        if original_length < 2:
-            return np.repeat(sample, self.target_frames, axis=0)
-
-        x_old = np.linspace(0, 1, original_length)
-        x_new = np.linspace(0, 1, self.target_frames)
-
-        # Interpolating each keypoint & coordinate (X, Y, Z) separately
-        interpolated_sample = np.array([
-            PchipInterpolator(x_old, sample[:, keypoint, coord])(x_new)
-            for keypoint in range(sample.shape[1])  # Loop over keypoints
-            for coord in range(sample.shape[2])     # Loop over (X, Y, Z)
-        ]).T.reshape(self.target_frames, sample.shape[1], sample.shape[2])  # Reshape back
-
-        return interpolated_sample
-    
-    def process_dataset(self):
-        """Processes the dataset, applying PCHIP interpolation to clips below 100 frames."""
+        return resample_clips(sample[np.newaxis], self.target_frames)[0]
+
+    def process_dataset(self, num_workers=None, chunk_size=256):
+        """Processes the dataset, applying PCHIP interpolation to clips below target_frames.
+
+        Clips of the same length are stacked and resampled together. With num_workers > 1
+        the chunks are spread over a process pool, which pays off for large datasets.
+        """
         if self.dataset is None:
             return
-        
-        for sample, label in zip(self.dataset['data'], self.dataset['labels']):
+
+        data = self.dataset['data']
+        labels = self.dataset['labels']
+        interpolated_data = list(data)  # Keep original if already target_frames+ frames
+
+        # Group short clips by length so each group is one (N, T, 33, 3) stack
+        groups = defaultdict(list)
+        for idx, sample in enumerate(data):
             if len(sample) < self.target_frames:
-                interpolated_sample = self.interpolate_sample(sample)
-            else:
-                interpolated_sample = sample  # Keep original if already 100+ frames
-            
-            self.interpolated_data.append(interpolated_sample)
-            self.interpolated_labels.append(label)
-        
+                groups[len(sample)].append(idx)
+
+        chunks = [
+            indices[start:start + chunk_size]
+            for indices in groups.values()
+            for start in range(0, len(indices), chunk_size)
+        ]
+        jobs = [(np.stack([data[idx] for idx in chunk]), self.target_frames) for chunk in chunks]
+
+        if num_workers and num_workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=num_workers) as pool:
+                results = list(pool.map(_resample_chunk, jobs))
+        else:
+            results = [_resample_chunk(job) for job in jobs]
+
+        for chunk, resampled in zip(chunks, results):
+            for idx, sample in zip(chunk, resampled):
+                interpolated_data[idx] = sample
+
+        self.interpolated_data.extend(interpolated_data)
+        self.interpolated_labels.extend(labels)
+
     def save_interpolated_dataset(self, output_path):
-        """Saves the new dataset with interpolated sequences."""
-        new_dataset = {'data': self.interpolated_data, 'labels': self.interpolated_labels}
-        np.save(output_path, new_dataset)
+        """Saves the new dataset with interpolated sequences (legacy pickle if output_path ends in .npy)."""
+        if output_path.endswith(".npy"):
+            new_dataset = {'data': self.interpolated_data, 'labels': self.interpolated_labels}
+            np.save(output_path, new_dataset)
+        else:
+            write_pose_dataset(output_path, self.interpolated_data, self.interpolated_labels)
         print(f"Interpolated dataset saved to {output_path}")
\ No newline at end of file
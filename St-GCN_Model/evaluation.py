@@ -0,0 +1,86 @@
+import argparse
+import time
+import torch
+from formatDataset import PoseDataset, make_loader, split_indices
+
+
+def evaluate(model, loader, num_classes, device=None, autocast_dtype=None):
+    """Runs model over loader and returns accuracy, confusion matrix and per-class precision/recall.
+
+    Predictions and labels stay on the device until the end; the confusion matrix is one bincount
+    over label * num_classes + prediction, so there is no per-batch host sync.
+    """
+    device = device or next(model.parameters()).device
+    was_training = model.training
+    model.eval()
+
+    predictions, targets = [], []
+    start = time.perf_counter()
+    with torch.inference_mode(), torch.autocast(device_type=device.type, dtype=autocast_dtype or torch.bfloat16,
+                                                enabled=autocast_dtype is not None):
+        for batch in loader:
+            inputs, labels = batch[0].to(device, non_blocking=True), batch[1].to(device, non_blocking=True)
+            predictions.append(model(inputs).argmax(dim=1))
+            targets.append(labels)
+
+    predictions, targets = torch.cat(predictions), torch.cat(targets)
+    confusion = torch.bincount(targets * num_classes + predictions, minlength=num_classes ** 2)
+    confusion = confusion.reshape(num_classes, num_classes).cpu()  # Rows: true class, columns: predicted
+    seconds = time.perf_counter() - start
+    model.train(was_training)
+
+    true_positives = confusion.diag().double()
+    samples = int(confusion.sum())
+    return {
+        'accuracy': float(true_positives.sum() / max(samples, 1)),
+        'confusion': confusion,
+        'precision': true_positives / confusion.sum(dim=0).clamp(min=1),
+        'recall': true_positives / confusion.sum(dim=1).clamp(min=1),
+        'samples': samples,
+        'seconds': seconds,
+        'samples_per_sec': samples / max(seconds, 1e-9),
+    }
+
+
+def print_report(metrics, label_map=None):
+    """Prints accuracy, throughput and a per-class precision/recall table."""
+    names = {idx: label for label, idx in (label_map or {}).items()}
+    print(f"Accuracy: {metrics['accuracy'] * 100:.2f}% on {metrics['samples']} clips "
+          f"in {metrics['seconds']:.2f}s ({metrics['samples_per_sec']:.0f} clips/sec)")
+    print(f"{'Class':<12}{'Precision':>10}{'Recall':>10}{'Support':>10}")
+    support = metrics['confusion'].sum(dim=1)
+    for idx in range(len(support)):
+        print(f"{str(names.get(idx, idx)):<12}{metrics['precision'][idx] * 100:>9.1f}%"
+              f"{metrics['recall'][idx] * 100:>9.1f}%{int(support[idx]):>10}")
+    print("Confusion matrix (rows: true, columns: predicted):")
+    print(metrics['confusion'])
+
+
+def main():
+    from modelRuntime import load_checkpoint
+
+    parser = argparse.ArgumentParser(description="Evaluates a trained STGCN checkpoint on a pose dataset.")
+    parser.add_argument("checkpoint", help="checkpoint saved by trainer.py")
+    parser.add_argument("--dataset", default="pose_dataset_interpolated")
+    parser.add_argument("--split", default="val", choices=["val", "all"],
+                        help="val re-creates the trainer's held-out split from the checkpoint's seed & fraction")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model, config, label_map = load_checkpoint(args.checkpoint, map_location=device)
+    checkpoint = torch.load(args.checkpoint, map_location="cpu")
+
+    dataset = PoseDataset(args.dataset, pack=True)
+    if label_map and label_map != dataset.label_map:
+        raise ValueError(f"Checkpoint labels {label_map} do not match the dataset's {dataset.label_map}")
+
+    indices = None
+    if args.split == "val":
+        _, indices = split_indices(dataset, checkpoint.get('val_fraction', 0.2), checkpoint.get('split_seed', 0))
+    loader = make_loader(dataset, batch_size=args.batch_size, shuffle=False, indices=indices, num_workers=0)
+    print_report(evaluate(model, loader, config['num_classes'], device), label_map)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import torch
+from modelRuntime import CONFIG_KEY, LABEL_MAP_KEY, ModelRuntime, check_parity, load_checkpoint
+
+ONNX_OPSET = 17
+
+
+def export_torchscript(model, output_path, example, config=None, label_map=None):
+    """Traces and freezes the model; the config and label map travel inside the file."""
+    with torch.no_grad():
+        # Freezing folds the parameters and the adjacency buffers into constants for faster CPU inference
+        module = torch.jit.freeze(torch.jit.trace(model.eval(), example))
+    extra_files = {CONFIG_KEY: json.dumps(config or {}), LABEL_MAP_KEY: json.dumps(label_map or {})}
+    torch.jit.save(module, output_path, _extra_files=extra_files)
+    return output_path
+
+
+def export_onnx(model, output_path, example, config=None, label_map=None, opset=ONNX_OPSET):
+    """Exports to ONNX with a dynamic batch axis; frames and nodes stay fixed at the example's shape."""
+    try:
+        import onnx
+    except ImportError:
+        raise ImportError("ONNX export needs the onnx package: pip install onnx")
+
+    torch.onnx.export(
+        model.eval(), (example,), output_path,
+        input_names=["keypoints"], output_names=["logits"],
+        dynamic_axes={"keypoints": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset, dynamo=False,
+    )
+
+    # Keep the config and label map with the graph so the runtime needs no side files
+    exported = onnx.load(output_path)
+    for key, value in ((CONFIG_KEY, config or {}), (LABEL_MAP_KEY, label_map or {})):
+        entry = exported.metadata_props.add()
+        entry.key, entry.value = key, json.dumps(value)
+    onnx.save(exported, output_path)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exports a trained STGCN checkpoint for inference.")
+    parser.add_argument("checkpoint", help="checkpoint saved by trainer.py (or a plain state dict)")
+    parser.add_argument("--output", default="stgcn", help="output path without extension")
+    parser.add_argument("--formats", nargs="+", default=["torchscript", "onnx"], choices=["torchscript", "onnx"])
+    parser.add_argument("--frames", type=int, default=60, help="clip length the model is exported for")
+    parser.add_argument("--check", action="store_true", help="compare each export against eager PyTorch")
+    args = parser.parse_args()
+
+    model, config, label_map = load_checkpoint(args.checkpoint)
+    example = torch.randn(2, config.get('in_channels', 3), args.frames, config.get('num_nodes', 33))
+
+    exporters = {"torchscript": (export_torchscript, ".ts"), "onnx": (export_onnx, ".onnx")}
+    for name in args.formats:
+        export, extension = exporters[name]
+        output_path = export(model, args.output + extension, example, config, label_map)
+        print(f"Saved {name} model to {output_path}")
+
+        if args.check:
+            runtime = ModelRuntime(output_path)
+            batch = torch.randn(8, *example.shape[1:]).numpy()  # Different batch size than the trace
+            difference = check_parity(runtime, model, batch)
+            eager = ModelRuntime(args.checkpoint)
+            print(f"  max abs diff vs eager: {difference:.2e}, "
+                  f"{runtime.benchmark(batch) * 1000:.2f} ms vs eager {eager.benchmark(batch) * 1000:.2f} ms per batch of 8")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,213 @@
+import os
+from collections import defaultdict
 import numpy as np
 import torch
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset, DataLoader, Sampler, Subset
+from poseDatasetStore import load_pose_dataset
 
 class PoseDataset(Dataset):
-    def __init__(self, dataset_path):
-        dataset = np.load(dataset_path, allow_pickle=True).item()
-        
-        self.data = dataset['data']  # List of numpy arrays (num_frames, 33, 3)
+    def __init__(self, dataset_path, pack=False):
+        dataset = load_pose_dataset(dataset_path)
+
+        self.data = dataset['data']  # Clips of shape (num_frames, 33, 3), memory-mapped for store directories
         self.labels = dataset['labels']  # List of labels (strings like "A", "B", etc.)
+        self.lengths = np.asarray(getattr(self.data, 'lengths', [len(clip) for clip in self.data]), dtype=np.int64)
 
         # Convert labels to numeric class indices
         self.label_map = {label: idx for idx, label in enumerate(sorted(set(self.labels)))}
         self.numeric_labels = [self.label_map[label] for label in self.labels]
 
-        # Convert to tensor & reshape to (num_samples, 3, 100, 33)
-        self.data = [torch.tensor(sample, dtype=torch.float32).permute(2, 0, 1) for sample in self.data]  
+        # Clips are converted to (3, num_frames, 33) tensors on access so large datasets stay on disk
         self.labels = torch.tensor(self.numeric_labels, dtype=torch.long)
 
+        # pack=True loads every clip once into one contiguous (N, 3, T, 33) tensor per clip length,
+        # so a same-length batch is a single index_select instead of N conversions
+        self.packed = None
+        if pack:
+            self.pack()
+
+    def pack(self):
+        """Packs the clips into contiguous per-length tensors; idx maps to (length, row) through self.rows."""
+        groups = defaultdict(list)
+        for idx, length in enumerate(self.lengths):
+            groups[int(length)].append(idx)
+
+        self.packed = {}
+        self.rows = np.empty(len(self.lengths), dtype=np.int64)
+        for length, indices in groups.items():
+            clips = np.stack([np.asarray(self.data[idx], dtype=np.float32) for idx in indices])
+            self.packed[length] = torch.from_numpy(clips).permute(0, 3, 1, 2).contiguous().share_memory_()
+            self.rows[indices] = np.arange(len(indices))
+
     def __len__(self):
         return len(self.labels)
 
     def __getitem__(self, idx):
-        return self.data[idx], self.labels[idx]
+        if self.packed is not None:
+            return self.packed[int(self.lengths[idx])][self.rows[idx]], self.labels[idx]
+        sample = torch.from_numpy(np.array(self.data[idx], dtype=np.float32)).permute(2, 0, 1)
+        return sample, self.labels[idx]
 
-import numpy as np
-from collections import Counter
+    def __getitems__(self, indices):
+        """Batched fetch used by DataLoader: one index_select when the batch shares a packed length."""
+        if self.packed is not None:
+            lengths = self.lengths[indices]
+            if (lengths == lengths[0]).all():
+                rows = torch.from_numpy(self.rows[indices])
+                return [(self.packed[int(lengths[0])].index_select(0, rows), self.labels[indices])]
+        return [self[idx] for idx in indices]
+
+
+def split_indices(dataset, val_fraction=0.2, seed=0):
+    """Stratified train/validation split: returns (train_indices, val_indices) with every class in the same ratio.
+
+    The split only depends on the labels, val_fraction and seed, so it can be re-created for evaluation.
+    """
+    generator = np.random.default_rng(seed)
+    labels = np.asarray(dataset.numeric_labels)
+    train, val = [], []
+    for label in np.unique(labels):
+        members = generator.permutation(np.flatnonzero(labels == label))
+        num_val = min(int(round(len(members) * val_fraction)), len(members) - 1)  # Keep one clip to train on
+        val.extend(members[:num_val])
+        train.extend(members[num_val:])
+    return np.sort(train), np.sort(val)
+
+
+class LengthBucketBatchSampler(Sampler):
+    """Yields batches of indices whose clips all have the same length, so they stack without padding.
+
+    Indices are shuffled inside each length bucket and the batches are shuffled across buckets every epoch.
+    Pass indices to sample only that subset of the dataset (e.g. a train/validation split).
+    """
+
+    def __init__(self, lengths, batch_size, shuffle=True, drop_last=False, seed=None, indices=None):
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.generator = torch.Generator()
+        if seed is not None:
+            self.generator.manual_seed(seed)
+
+        if indices is None:
+            indices = range(len(lengths))
+        buckets = defaultdict(list)
+        for idx in indices:
+            buckets[int(lengths[idx])].append(int(idx))
+        self.buckets = [torch.tensor(members, dtype=torch.long) for members in buckets.values()]
+
+    def __iter__(self):
+        batches = []
+        for bucket in self.buckets:
+            if self.shuffle:
+                bucket = bucket[torch.randperm(len(bucket), generator=self.generator)]
+            for start in range(0, len(bucket), self.batch_size):
+                batch = bucket[start:start + self.batch_size]
+                if len(batch) < self.batch_size and self.drop_last:
+                    continue
+                batches.append(batch.tolist())
+
+        order = torch.randperm(len(batches), generator=self.generator).tolist() if self.shuffle else range(len(batches))
+        for batch_index in order:
+            yield batches[batch_index]
+
+    def __len__(self):
+        if self.drop_last:
+            return sum(len(bucket) // self.batch_size for bucket in self.buckets)
+        return sum(-(-len(bucket) // self.batch_size) for bucket in self.buckets)
+
+
+class PadCropCollate:
+    """Collates clips of any length into (B, 3, num_frames, 33) plus a (B, num_frames) bool mask of real frames.
+
+    Longer clips are center-cropped, shorter ones zero-padded at the end.
+    """
+
+    def __init__(self, num_frames):
+        self.num_frames = num_frames
+
+    def __call__(self, batch):
+        samples = [sample for item in batch for sample in _unbatch(item)]
+        inputs = torch.zeros(len(samples), samples[0][0].size(0), self.num_frames, samples[0][0].size(2))
+        mask = torch.zeros(len(samples), self.num_frames, dtype=torch.bool)
+        for row, (clip, _) in enumerate(samples):
+            length = clip.size(1)
+            start = max(0, (length - self.num_frames) // 2)
+            clip = clip[:, start:start + self.num_frames]
+            inputs[row, :, :clip.size(1)] = clip
+            mask[row, :clip.size(1)] = True
+        labels = torch.stack([label for _, label in samples])
+        return inputs, labels, mask
+
+
+def _unbatch(item):
+    """Splits a packed (inputs, labels) batch from __getitems__ back into samples; single samples pass through."""
+    inputs, labels = item
+    if labels.dim() == 0:
+        return [item]
+    return list(zip(inputs, labels))
+
+
+def collate_batches(batch):
+    """Collate for same-length batches: passes packed batches through and stacks everything else."""
+    if len(batch) == 1 and batch[0][1].dim() == 1:
+        return batch[0]
+    return torch.stack([clip for clip, _ in batch]), torch.stack([label for _, label in batch])
+
+
+def make_loader(dataset, batch_size=16, shuffle=True, num_frames=None, num_workers=None, pin_memory=None,
+                prefetch_factor=4, drop_last=False, seed=None, indices=None):
+    """DataLoader that keeps the training loop fed.
+
+    By default batches are bucketed by clip length so mixed-length datasets batch without padding; pass
+    num_frames to pad/crop every clip to that length instead (batches then carry a third item, the mask).
+    Workers prefetch prefetch_factor batches each and stay alive between epochs; pinned memory lets the
+    host-to-GPU copy run asynchronously (.to(device, non_blocking=True)). indices restricts the
+    loader to a subset, e.g. one side of split_indices().
+    """
+    if num_workers is None:
+        num_workers = min(4, os.cpu_count() or 1)
+    if pin_memory is None:
+        pin_memory = torch.cuda.is_available()
+
+    worker_options = {}
+    if num_workers > 0:
+        worker_options = {'prefetch_factor': prefetch_factor, 'persistent_workers': True}
+
+    if num_frames is not None:
+        if indices is not None:
+            dataset = Subset(dataset, indices)
+        return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, drop_last=drop_last,
+                          collate_fn=PadCropCollate(num_frames), num_workers=num_workers,
+                          pin_memory=pin_memory, **worker_options)
+
+    sampler = LengthBucketBatchSampler(dataset.lengths, batch_size, shuffle=shuffle, drop_last=drop_last, seed=seed,
+                                       indices=indices)
+    return DataLoader(dataset, batch_sampler=sampler, collate_fn=collate_batches, num_workers=num_workers,
+                      pin_memory=pin_memory, **worker_options)
+
+
+if __name__ == "__main__":
+    from collections import Counter
 
-dataset_path = "pose_dataset_interpolated.npy"
+    dataset_path = "pose_dataset_interpolated"
 
-# Load dataset
-dataset = np.load(dataset_path, allow_pickle=True).item()
+    # Load dataset
+    dataset = load_pose_dataset(dataset_path)
 
-# Extract data and labels
-data = dataset['data']
-labels = dataset['labels']
+    # Extract data and labels
+    data = dataset['data']
+    labels = dataset['labels']
 
-# Check dataset size
-print(f"Total Samples: {len(data)}")
+    # Check dataset size
+    print(f"Total Samples: {len(data)}")
 
-# Count occurrences of each label
-label_counts = Counter(labels)
-print("Label Distribution:")
-for label, count in label_counts.items():
-    print(f"{label}: {count} occurrences")
+    # Count occurrences of each label
+    label_counts = Counter(labels)
+    print("Label Distribution:")
+    for label, count in label_counts.items():
+        print(f"{label}: {count} occurrences")
 
-# Print shapes of each sample
-for i, sample in enumerate(data[:5]):  # Print only first 5 to avoid long output
-    print(f"Sample {i}: Shape {sample.shape}, Label: {labels[i]}")
+    # Print shapes of each sample
+    for i in range(min(5, len(data))):  # Print only first 5 to avoid long output
+        print(f"Sample {i}: Shape {data[i].shape}, Label: {labels[i]}")
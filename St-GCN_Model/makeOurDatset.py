@@ -4,9 +4,22 @@ import cv2
 import numpy as np
 import mediapipe as mp
 import os
+import sys
 from PCHIP_Interploator import PCHIPInterpolator
+from poseDatasetStore import PoseDatasetWriter
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "BlazePoseModels"))
+from landmarkFrame import NUM_LANDMARKS, LANDMARK_FIELDS, fill_from_landmarks
+from landmarkCache import LandmarkCache, DEFAULT_CACHE_DIR, model_digest
+from skeletonRenderer import draw_skeleton
+from prefetchDecoder import PrefetchDecoder
 
 video_path = "Videos\Input\Ryan.mp4"
+dataset_path = "pose_dataset"
+
+# Landmarks are cached per video content & pose settings, so relabeling the same video skips inference
+USE_LANDMARK_CACHE = True
+LANDMARK_CACHE_DIR = DEFAULT_CACHE_DIR
+POSE_OPTIONS = {'static_image_mode': False, 'min_detection_confidence': 0.5, 'min_tracking_confidence': 0.5}
 
 # Button Positions (X1, Y1, X2, Y2)
 BUTTONS = {
@@ -22,15 +35,12 @@ BUTTONS = {
 paused = False
 current_label = None  # Active label while holding button
 segment_data = []
-dataset_data = []
-dataset_labels = []
 prev_frame = None  # Store last known frame for interpolation
 frame_count = 0  # Track frames within the current 60-frame segment
 segment_label = None  # Stores label for the current segment
 
 # Initialize Mediapipe
 mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
 
 # Create button window
 button_window = np.ones((700, 800, 3), dtype=np.uint8) * 255  
@@ -74,23 +84,41 @@ def check_button_status(x, y, event_type):
                     current_label = None  # Reset label on release
             return
 
-def extract_keypoints(results):
-    """Extracts 33 pose keypoints, ensuring all frames have complete data."""
-    global prev_frame
-    keypoints = np.zeros((33, 3)) if prev_frame is None else prev_frame.copy()
-    visible_count = 0
+def detect_landmarks(frame, frame_idx, detector, cache=None, image_rgb=None):
+    """(33, 4) landmarks (x, y, z, visibility) of a BGR frame, NaN rows if no pose; a cache hit skips the model.
+
+    image_rgb, if the decoder already converted the frame, saves the conversion here.
+    """
+    if cache is not None:
+        landmarks = cache.get(frame_idx)
+        if landmarks is not None:
+            return landmarks
+
+    # Convert to RGB
+    if image_rgb is None:
+        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    image_rgb.flags.writeable = False
+    results = detector().process(image_rgb)
 
+    landmarks = np.full((NUM_LANDMARKS, LANDMARK_FIELDS), np.nan, dtype=np.float32)
     if results.pose_landmarks:
-        for i, lm in enumerate(results.pose_landmarks.landmark):
-            if i < 33:
-                keypoints[i] = [lm.x, lm.y, lm.z]
-                if lm.visibility > 0.5:  # Only count keypoints with high confidence
-                    visible_count += 1
+        fill_from_landmarks(results.pose_landmarks.landmark[:NUM_LANDMARKS], landmarks)
+
+    if cache is not None:
+        cache.put(frame_idx, landmarks)
+    return landmarks
+
+def extract_keypoints(landmarks):
+    """Extracts 33 pose keypoints, ensuring all frames have complete data."""
+    global prev_frame
+    # Only count keypoints with high confidence; NaN (no pose) never does
+    visible_count = int(np.count_nonzero(landmarks[:, 3] > 0.5))
 
     # Skip frame if too many keypoints are missing
     if visible_count < 20:  
         return None  
 
+    keypoints = landmarks[:, :3].astype(np.float64)
     prev_frame = keypoints  # Save for next frame interpolation
     return keypoints
 
@@ -99,20 +127,35 @@ def mouse_callback(event, x, y, flags, param):
     if event in [cv2.EVENT_LBUTTONDOWN, cv2.EVENT_LBUTTONUP]:
         check_button_status(x, y, event)
 
-def main():
-    global paused, segment_data, frame_count, segment_label
+def resume_positions(state):
+    """video_path -> first frame not yet labeled, from a dataset writer's state (also the older single-video form)."""
+    positions = dict(state.get('next_frames', {}))
+    if 'video_path' in state:
+        positions.setdefault(state['video_path'], state['next_frame'])
+    return positions
 
+def main():
     if not os.path.exists(video_path):
         print(f"Video file not found: {video_path}")
         return
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
+    # Segments are appended to disk in chunks, so a crash or early quit keeps everything already flushed
+    # Each labeled video keeps its own resume position, so going back to an earlier video never relabels it
+    writer = PoseDatasetWriter(dataset_path, resume=True)
+    start_frame = resume_positions(writer.state).get(video_path, 0)
+    if start_frame:
+        print(f"Resuming {video_path} in {dataset_path} ({len(writer)} segments) at frame {start_frame}")
+
+    # Frames (and their RGB conversion) are decoded ahead on a background thread while the model runs
+    try:
+        decoder = PrefetchDecoder(video_path, start_frame, rgb=True)
+    except FileNotFoundError:
         print("Error opening video file!")
+        writer.close()
         return
 
-    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_width = decoder.source_width
+    original_height = decoder.source_height
 
     # Scale down while maintaining aspect ratio
     max_height = 900
@@ -127,27 +170,49 @@ def main():
     cv2.resizeWindow("Buttons", 800, 700)
     cv2.setMouseCallback("Buttons", mouse_callback)
 
-    with mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
-        while cap.isOpened():
+    try:
+        label_video(decoder, writer)
+    finally:
+        writer.close()
+        decoder.close()
+        cv2.destroyAllWindows()
+
+    print(f"Dataset saved as {dataset_path}")
+
+def label_video(decoder, writer):
+    """Runs pose extraction & labeling until the video ends or 'q' is pressed, appending each 60-frame segment to writer."""
+    global paused, segment_data, frame_count, segment_label
+
+    cache = None
+    if USE_LANDMARK_CACHE:
+        cache = LandmarkCache(LANDMARK_CACHE_DIR).open(video_path, model_digest(None, solution="pose", **POSE_OPTIONS),
+                                                       decoder.frame_count)
+
+    # The Pose model is only created on the first frame missing from the cache
+    pose = None
+    def detector():
+        nonlocal pose
+        if pose is None:
+            pose = mp_pose.Pose(**POSE_OPTIONS)
+        return pose
+
+    try:
+        while True:
             if not paused:
-                ret, frame = cap.read()
-                if not ret:
+                # The frame stays valid while paused, since its buffer is only reused on the next read
+                decoded = decoder.read()
+                if decoded is None:
                     print("End of video")
                     break
 
-
-                # Convert to RGB
-                image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image_rgb.flags.writeable = False
-                results = pose.process(image_rgb)
-                image_rgb.flags.writeable = True
+                frame_idx, frame, image_rgb = decoded
+                landmarks = detect_landmarks(frame, frame_idx, detector, cache, image_rgb)
 
                 # Draw keypoints
-                if results.pose_landmarks:
-                    mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+                draw_skeleton(frame, landmarks, bgr=True)
 
                 # Extract keypoints & add to dataset if valid
-                keypoints = extract_keypoints(results)
+                keypoints = extract_keypoints(landmarks)
                 if keypoints is not None:
                     segment_data.append(keypoints)
 
@@ -155,8 +220,10 @@ def main():
 
                 # When 60 frames are reached, store the segment
                 if frame_count == 60:
-                    dataset_data.append(np.array(segment_data))
-                    dataset_labels.append(segment_label if segment_label else "None")  # Assign stored label
+                    positions = resume_positions(writer.state)
+                    positions[video_path] = frame_idx + 1
+                    writer.state = {'next_frames': positions}
+                    writer.append(np.array(segment_data), segment_label if segment_label else "None")  # Assign stored label
                     segment_data = []  # Reset for next 60 frames
                     frame_count = 0  # Reset frame counter
                     segment_label = None  # Reset label for new clip
@@ -168,17 +235,14 @@ def main():
             # Quit on 'q'
             if cv2.waitKey(50) & 0xFF == ord('q'):
                 break
-
-    cap.release()
-    cv2.destroyAllWindows()
-
-    # Save dataset
-    dataset = {'data': dataset_data, 'labels': dataset_labels}
-    np.save("pose_dataset.npy", dataset)
-    print("Dataset saved as pose_dataset.npy")
+    finally:
+        if cache is not None:
+            cache.flush()
+        if pose is not None:
+            pose.close()
 
 if __name__ == "__main__":
     main()
-    interpolator = PCHIPInterpolator("pose_dataset.npy", 200)
+    interpolator = PCHIPInterpolator(dataset_path, 200)
     interpolator.process_dataset()
-    interpolator.save_interpolated_dataset("pose_dataset_interpolated.npy")
+    interpolator.save_interpolated_dataset("pose_dataset_interpolated")
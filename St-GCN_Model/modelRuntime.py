@@ -0,0 +1,117 @@
+import json
+import os
+import time
+import numpy as np
+import torch
+from GraphConvolution import STGCN
+
+# Export metadata stored alongside the weights (TorchScript extra files / ONNX metadata_props)
+CONFIG_KEY = "config.json"
+LABEL_MAP_KEY = "label_map.json"
+
+TORCHSCRIPT_EXTENSIONS = (".ts", ".torchscript")
+ONNX_EXTENSIONS = (".onnx",)
+
+
+def load_checkpoint(path, map_location="cpu"):
+    """Loads an eval-mode STGCN from a training checkpoint or a plain state dict; returns (model, config, label_map)."""
+    checkpoint = torch.load(path, map_location=map_location)
+    state = checkpoint.get('model_state', checkpoint)
+    config = dict(checkpoint.get('config', {}))
+    if not config:
+        # Plain state dict: read the shapes back from the weights
+        in_channels = 3
+        config = {
+            'in_channels': in_channels,
+            'num_nodes': state['fc.weight'].shape[1] // state['temporal_conv3.weight'].shape[0],
+            'num_classes': state['fc.weight'].shape[0],
+            'partition_strategy': "spatial" if state['graph_conv1.conv.weight'].shape[1] > in_channels else "uniform",
+        }
+    model = STGCN(**config)
+    model.load_state_dict(state)
+    return model.to(map_location).eval(), config, checkpoint.get('label_map')
+
+
+class ModelRuntime:
+    """Batched CPU inference for an exported STGCN, without the training code.
+
+    The format is picked from the file extension: .onnx runs on onnxruntime, .ts/.torchscript on
+    torch.jit, anything else is loaded as a checkpoint and run eagerly. Inputs are
+    (batch, 3, num_frames, 33) arrays; the batch axis is dynamic.
+    """
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self.config = {}
+        self.label_map = None
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension in ONNX_EXTENSIONS:
+            try:
+                import onnxruntime as ort
+            except ImportError:
+                raise ImportError("Running .onnx models needs onnxruntime: pip install onnxruntime")
+            session_options = ort.SessionOptions()
+            if num_threads:
+                session_options.intra_op_num_threads = num_threads
+            self.session = ort.InferenceSession(path, session_options, providers=["CPUExecutionProvider"])
+            self.input_name = self.session.get_inputs()[0].name
+            metadata = self.session.get_modelmeta().custom_metadata_map
+            self._read_metadata(metadata.get(CONFIG_KEY), metadata.get(LABEL_MAP_KEY))
+            self.format = "onnx"
+        else:
+            if num_threads:
+                torch.set_num_threads(num_threads)
+            if extension in TORCHSCRIPT_EXTENSIONS:
+                extra_files = {CONFIG_KEY: "", LABEL_MAP_KEY: ""}
+                self.module = torch.jit.load(path, map_location="cpu", _extra_files=extra_files)
+                self._read_metadata(extra_files[CONFIG_KEY], extra_files[LABEL_MAP_KEY])
+                self.format = "torchscript"
+            else:
+                self.module, self.config, self.label_map = load_checkpoint(path)
+                self.format = "eager"
+
+    def _read_metadata(self, config, label_map):
+        if config:
+            self.config = json.loads(config)
+        if label_map:
+            self.label_map = json.loads(label_map)
+
+    def predict(self, batch, batch_size=64):
+        """Returns (batch, num_classes) float32 logits, running batch_size samples at a time."""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        outputs = []
+        for start in range(0, len(batch), batch_size):
+            chunk = batch[start:start + batch_size]
+            if self.format == "onnx":
+                outputs.append(self.session.run(None, {self.input_name: chunk})[0])
+            else:
+                with torch.inference_mode():
+                    outputs.append(self.module(torch.from_numpy(chunk)).numpy())
+        return np.concatenate(outputs)
+
+    def classify(self, batch, batch_size=64):
+        """Returns the predicted class index of every sample, and its label when the export carries a label map."""
+        indices = self.predict(batch, batch_size).argmax(axis=1)
+        if not self.label_map:
+            return indices, None
+        labels = {idx: label for label, idx in self.label_map.items()}
+        return indices, [labels[int(idx)] for idx in indices]
+
+    def benchmark(self, batch, repeats=20):
+        """Average seconds per predict() call on batch, after one warm-up run."""
+        self.predict(batch)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            self.predict(batch)
+        return (time.perf_counter() - start) / repeats
+
+
+def check_parity(runtime, model, batch, atol=1e-4):
+    """Compares a runtime's logits with the eager model's on batch; returns the max abs difference."""
+    with torch.inference_mode():
+        expected = model(torch.as_tensor(batch, dtype=torch.float32)).numpy()
+    difference = float(np.abs(runtime.predict(batch) - expected).max())
+    if difference > atol:
+        raise AssertionError(f"{runtime.format} output differs from eager by {difference:.2e} (atol {atol:.0e})")
+    return difference
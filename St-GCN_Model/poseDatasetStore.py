@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import numpy as np
+
+# On-disk layout of a pose dataset directory:
+#   keypoints.f32  one contiguous float32 buffer of every frame, shape (total_frames, 33, 3)
+#   offsets.npy    int64 start frame of each clip inside keypoints.f32
+#   lengths.npy    int64 number of frames of each clip
+#   labels.npy     unicode label of each clip
+#   meta.json      buffer shape & dtype and the committed clip/frame counts, so the buffer can be
+#                  memory-mapped without reading it
+#
+# meta.json is replaced last on every commit. Readers only trust the first num_clips index entries
+# and the first total_frames frames, so a crash part-way through a write leaves the previous commit intact.
+KEYPOINTS_FILE = "keypoints.f32"
+OFFSETS_FILE = "offsets.npy"
+LENGTHS_FILE = "lengths.npy"
+LABELS_FILE = "labels.npy"
+META_FILE = "meta.json"
+
+
+class PoseDatasetStore:
+    """Read-only ragged pose dataset backed by np.memmap.
+
+    Opening is constant time: only the small index is read, clips are views into the
+    memory-mapped keypoint buffer and are paged in when touched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+
+        num_clips = self.meta.get('num_clips')
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE))[:num_clips]
+        self.lengths = np.load(os.path.join(path, LENGTHS_FILE))[:num_clips]
+        self.labels = np.load(os.path.join(path, LABELS_FILE))[:num_clips].tolist()
+
+        frame_shape = tuple(self.meta['frame_shape'])
+        total_frames = self.meta['total_frames']
+        if total_frames:
+            self.keypoints = np.memmap(os.path.join(path, KEYPOINTS_FILE), dtype=self.meta['dtype'],
+                                       mode='r', shape=(total_frames,) + frame_shape)
+        else:
+            self.keypoints = np.empty((0,) + frame_shape, dtype=self.meta['dtype'])
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, idx):
+        """Returns clip idx as a (num_frames, 33, 3) view into the memory-mapped buffer."""
+        start = self.offsets[idx]
+        return self.keypoints[start:start + self.lengths[idx]]
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __reduce__(self):
+        # Reopen by path instead of pickling the mapped buffer (DataLoader workers under spawn)
+        return (PoseDatasetStore, (self.path,))
+
+
+def is_pose_dataset_store(path):
+    """True if path is a dataset directory written by write_pose_dataset."""
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def load_pose_dataset(path):
+    """Loads a dataset as {'data': clips, 'labels': labels} from a store directory or a legacy pickled .npy file."""
+    if is_pose_dataset_store(path):
+        store = PoseDatasetStore(path)
+        return {'data': store, 'labels': store.labels}
+    return np.load(path, allow_pickle=True).item()
+
+
+def _save_atomic(path, save):
+    """Writes a file through a temporary name and os.replace so readers never see it half written."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        save(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PoseDatasetWriter:
+    """Append-only, crash-safe writer for a store directory.
+
+    Clips are buffered in memory and flushed every flush_every clips: the keypoint bytes are appended
+    and fsynced first, then the index and finally meta.json are replaced atomically. Memory stays
+    bounded by the flush buffer plus the small per-clip index. With resume=True an existing store is
+    reopened, anything after its last commit is discarded and appending continues from there.
+    """
+
+    def __init__(self, path, frame_shape=(33, 3), flush_every=8, resume=True):
+        self.path = path
+        self.frame_shape = tuple(frame_shape)
+        self.flush_every = flush_every
+        self.lengths = []
+        self.labels = []
+        self.state = {}  # Free-form progress info committed with the next flush; set it before append()
+        self._pending = []
+
+        os.makedirs(path, exist_ok=True)
+        keypoints_path = os.path.join(path, KEYPOINTS_FILE)
+
+        if resume and is_pose_dataset_store(path):
+            store = PoseDatasetStore(path)
+            if tuple(store.meta['frame_shape']) != self.frame_shape:
+                raise ValueError(f"Cannot resume {path}: frame shape {store.meta['frame_shape']} != {list(self.frame_shape)}")
+            self.lengths = store.lengths.tolist()
+            self.labels = list(store.labels)
+            self.state = store.meta.get('state', {})
+            del store
+
+        self.total_frames = sum(self.lengths)
+        frame_bytes = int(np.prod(self.frame_shape)) * np.dtype(np.float32).itemsize
+
+        if not resume or not is_pose_dataset_store(path):
+            self._commit()  # Start from an empty commit before the old buffer is cut
+
+        # Drop bytes from a write that never got committed
+        self._file = open(keypoints_path, 'r+b' if os.path.exists(keypoints_path) else 'wb')
+        self._file.truncate(self.total_frames * frame_bytes)
+        self._file.seek(0, os.SEEK_END)
+
+    def __len__(self):
+        return len(self.lengths) + len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def append(self, clip, label):
+        """Queues one clip of shape (num_frames, 33, 3); flushes once flush_every clips are pending."""
+        clip = np.ascontiguousarray(clip, dtype=np.float32).reshape((-1,) + self.frame_shape)
+        self._pending.append((clip, str(label)))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Appends pending clips to the keypoint buffer and commits them."""
+        if not self._pending:
+            self._commit()
+            return
+
+        for clip, label in self._pending:
+            self._file.write(clip.tobytes())
+            self.lengths.append(len(clip))
+            self.labels.append(label)
+            self.total_frames += len(clip)
+        self._pending = []
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._commit()
+
+    def close(self):
+        """Flushes any pending clips and closes the keypoint buffer."""
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def _commit(self):
+        lengths = np.asarray(self.lengths, dtype=np.int64)
+        offsets = (np.cumsum(lengths) - lengths).astype(np.int64)
+        labels = np.asarray(self.labels, dtype=np.str_)
+
+        _save_atomic(os.path.join(self.path, OFFSETS_FILE), lambda f: np.save(f, offsets))
+        _save_atomic(os.path.join(self.path, LENGTHS_FILE), lambda f: np.save(f, lengths))
+        _save_atomic(os.path.join(self.path, LABELS_FILE), lambda f: np.save(f, labels))
+
+        meta = {
+            'dtype': 'float32',
+            'frame_shape': list(self.frame_shape),
+            'total_frames': int(self.total_frames),
+            'num_clips': len(self.lengths),
+            'state': self.state,
+        }
+        _save_atomic(os.path.join(self.path, META_FILE), lambda f: f.write(json.dumps(meta).encode()))
+
+
+def write_pose_dataset(path, clips, labels, frame_shape=(33, 3)):
+    """Writes clips & labels as a new store directory, streaming them through a PoseDatasetWriter."""
+    with PoseDatasetWriter(path, frame_shape=frame_shape, flush_every=256, resume=False) as writer:
+        for clip, label in zip(clips, labels):
+            writer.append(clip, label)
+
+
+def convert_npy_dataset(npy_path, output_path):
+    """Converts a legacy pickled {'data', 'labels'} .npy dataset to a store directory."""
+    dataset = np.load(npy_path, allow_pickle=True).item()
+    frame_shape = dataset['data'][0].shape[1:] if len(dataset['data']) else (33, 3)
+    write_pose_dataset(output_path, dataset['data'], dataset['labels'], frame_shape=frame_shape)
+    print(f"Converted {len(dataset['data'])} clips from {npy_path} to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a pickled pose_dataset .npy file to the memory-mapped store format.")
+    parser.add_argument("npy_path")
+    parser.add_argument("output_path")
+    args = parser.parse_args()
+    convert_npy_dataset(args.npy_path, args.output_path)
@@ -0,0 +1,153 @@
+import argparse
+import copy
+import json
+import time
+import torch
+import torch.nn as nn
+from torch.ao.nn.intrinsic import ConvReLU2d
+from torch.ao.quantization import DeQuantStub, QuantStub, convert, get_default_qconfig, prepare, quantize_dynamic
+from torch.utils.data import DataLoader, Subset
+from formatDataset import PoseDataset, split_indices
+from modelRuntime import CONFIG_KEY, LABEL_MAP_KEY, load_checkpoint
+
+DYNAMIC = "dynamic"  # int8 weights for fc only, activations quantized on the fly
+STATIC = "static"    # int8 graph & temporal convs, activation ranges calibrated on the training split
+FULL = "full"        # both
+
+
+def quantized_engine():
+    """x86/fbgemm kernels on Intel & AMD, qnnpack on ARM."""
+    engines = torch.backends.quantized.supported_engines
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in engines:
+            return engine
+    raise RuntimeError("This PyTorch build has no quantized CPU engine")
+
+
+class QuantizableBlock(nn.Module):
+    """One STGCN layer with int8 convs.
+
+    The node aggregation (einsum over the adjacency) has no quantized kernel and stays in fp32; the
+    1x1 graph conv and the temporal conv, fused with its ReLU, run back to back on int8 activations.
+    """
+
+    def __init__(self, graph_conv, temporal_conv):
+        super(QuantizableBlock, self).__init__()
+        self.graph_conv = graph_conv
+        self.quant = QuantStub()
+        self.temporal_conv = ConvReLU2d(temporal_conv, nn.ReLU())
+        self.dequant = DeQuantStub()
+
+    def forward(self, x):
+        x = self.quant(self.graph_conv.aggregate(x))
+        x = self.temporal_conv(self.graph_conv.conv(x))
+        return self.dequant(x)
+
+
+class QuantizableSTGCN(nn.Module):
+    """STGCN rearranged for eager-mode quantization; shares weights with the model it wraps."""
+
+    def __init__(self, model):
+        super(QuantizableSTGCN, self).__init__()
+        self.blocks = nn.ModuleList([
+            QuantizableBlock(model.graph_conv1, model.temporal_conv1),
+            QuantizableBlock(model.graph_conv2, model.temporal_conv2),
+            QuantizableBlock(model.graph_conv3, model.temporal_conv3),
+        ])
+        self.fc = model.fc
+
+    def forward(self, x):
+        for block in self.blocks:
+            x = block(x)
+        x = x.mean(dim=2)  # Global pooling over time
+        x = x.view(x.size(0), -1)
+        return self.fc(x)
+
+
+def calibrate(model, loader, num_batches):
+    """Runs num_batches of loader through a prepared model so the observers record activation ranges."""
+    with torch.inference_mode():
+        for batch_index, (inputs, _) in enumerate(loader):
+            if batch_index >= num_batches:
+                break
+            model(inputs)
+
+
+def quantize(model, mode=FULL, calibration_loader=None, calibration_batches=32):
+    """Returns an int8 copy of an fp32 STGCN; the original is left untouched."""
+    torch.backends.quantized.engine = quantized_engine()
+    model = copy.deepcopy(model).cpu().eval()
+
+    if mode in (STATIC, FULL):
+        if calibration_loader is None:
+            raise ValueError("Static quantization needs a calibration_loader")
+        model = QuantizableSTGCN(model).eval()
+        model.qconfig = get_default_qconfig(torch.backends.quantized.engine)
+        model.fc.qconfig = None  # fc is handled by dynamic quantization below
+        prepare(model, inplace=True)
+        calibrate(model, calibration_loader, calibration_batches)
+        convert(model, inplace=True)
+
+    if mode in (DYNAMIC, FULL):
+        model = quantize_dynamic(model, {'fc'}, dtype=torch.qint8)
+
+    return model
+
+
+def evaluate(model, loader):
+    """Returns (accuracy, windows per second) of model over loader."""
+    correct, total, elapsed = 0, 0, 0.0
+    with torch.inference_mode():
+        for inputs, labels in loader:
+            start = time.perf_counter()
+            outputs = model(inputs)
+            elapsed += time.perf_counter() - start
+            correct += (outputs.argmax(dim=1) == labels).sum().item()
+            total += labels.size(0)
+    return correct / max(total, 1), total / max(elapsed, 1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post-training int8 quantization of a trained STGCN.")
+    parser.add_argument("checkpoint", help="checkpoint saved by trainer.py")
+    parser.add_argument("--dataset", default="pose_dataset_interpolated",
+                        help="calibrated on the trainer's training split, evaluated on its held-out split")
+    parser.add_argument("--mode", default=FULL, choices=[DYNAMIC, STATIC, FULL])
+    parser.add_argument("--calibration-batches", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=1, help="CPU threads for the speed comparison")
+    parser.add_argument("--output", default="stgcn_int8.ts", help="TorchScript file for modelRuntime.py")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    model, config, label_map = load_checkpoint(args.checkpoint)
+    checkpoint = torch.load(args.checkpoint, map_location="cpu")
+    dataset = PoseDataset(args.dataset)
+
+    # Activation ranges come from windows the accuracy is never measured on, so the drop isn't optimistic
+    train_indices, val_indices = split_indices(dataset, checkpoint.get('val_fraction', 0.2),
+                                               checkpoint.get('split_seed', 0))
+    if len(val_indices) == 0:
+        raise ValueError(f"{args.dataset} is too small to hold out evaluation windows")
+    calibration_loader = DataLoader(Subset(dataset, train_indices), batch_size=args.batch_size, shuffle=True)
+    eval_loader = DataLoader(Subset(dataset, val_indices), batch_size=args.batch_size)
+
+    quantized = quantize(model, args.mode, calibration_loader, args.calibration_batches)
+
+    fp32_accuracy, fp32_speed = evaluate(model, eval_loader)
+    int8_accuracy, int8_speed = evaluate(quantized, eval_loader)
+    print(f"fp32: accuracy {fp32_accuracy * 100:.2f}%, {fp32_speed:.1f} windows/sec")
+    print(f"int8 ({args.mode}): accuracy {int8_accuracy * 100:.2f}%, {int8_speed:.1f} windows/sec")
+    print(f"Accuracy drop: {(fp32_accuracy - int8_accuracy) * 100:.2f} points, speedup: {int8_speed / fp32_speed:.2f}x "
+          f"on {args.threads} thread(s)")
+
+    example, _ = next(iter(eval_loader))
+    with torch.no_grad():
+        traced = torch.jit.trace(quantized, example)
+    torch.jit.save(traced, args.output,
+                   _extra_files={CONFIG_KEY: json.dumps(config), LABEL_MAP_KEY: json.dumps(label_map or {})})
+    print(f"Saved quantized model to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
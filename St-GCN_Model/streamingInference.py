@@ -0,0 +1,163 @@
+import numpy as np
+import torch
+import torch.nn.functional as F
+from modelRuntime import load_checkpoint
+
+LAYER_NAMES = (
+    ("graph_conv1", "temporal_conv1"),
+    ("graph_conv2", "temporal_conv2"),
+    ("graph_conv3", "temporal_conv3"),
+)
+
+
+class StreamingSTGCN:
+    """Sliding-window STGCN classifier that does constant work per frame.
+
+    push() returns the same logits as model(window) on the last `window` frames, without rerunning the
+    whole window. Every layer keeps a ring buffer of its graph conv outputs (z) and activations (y),
+    and each new frame computes one newly exposed time step per layer. Only the last
+    len(LAYER_NAMES) frames at each end of the window see the temporal convs' zero padding; those few
+    are recomputed from the cached neighbours. The global time mean is a running sum over the
+    rest of the window.
+
+    Frames without a detected pose (NaN keypoints) should not be pushed; they would poison the sum.
+    """
+
+    def __init__(self, model, window=60):
+        self.model = model.eval()
+        self.window = window
+        self.depth = len(LAYER_NAMES)
+        self.layers = []
+        for gc_name, tc_name in LAYER_NAMES:
+            temporal_conv = getattr(model, tc_name)
+            if temporal_conv.kernel_size != (3, 1) or temporal_conv.padding != (1, 0):
+                raise ValueError("StreamingSTGCN needs (3, 1) temporal convs with (1, 0) padding")
+            self.layers.append((getattr(model, gc_name), temporal_conv))
+
+        parameter = next(model.parameters())
+        self.device, self.dtype = parameter.device, parameter.dtype
+        self.num_nodes = model.fc.in_features // self.layers[-1][1].out_channels
+        # Large enough to still hold the frame that leaves the running sum when the window slides
+        self.ring_size = window + 2 * self.depth
+        self.label_map = None
+        self.reset()
+
+    @classmethod
+    def from_checkpoint(cls, path, window=60, map_location="cpu"):
+        """Builds a streaming classifier from a saved STGCN state dict or a training checkpoint."""
+        model, _, label_map = load_checkpoint(path, map_location)
+        streaming = cls(model, window)
+        streaming.label_map = label_map
+        return streaming
+
+    def reset(self):
+        """Forgets every pushed frame."""
+        channels = [layer[1].out_channels for layer in self.layers]
+        in_channels = self.layers[0][0].conv.in_channels // self.layers[0][0].A.size(0)
+        ring = lambda c: torch.zeros(c, self.ring_size, self.num_nodes, device=self.device, dtype=self.dtype)
+
+        self.inputs = ring(in_channels)
+        self.z = [ring(c) for c in channels]
+        self.y = [ring(c) for c in channels]
+        self.frame_count = 0
+
+        # Running sum of the last layer's activations over the interior frames [sum_start, sum_end)
+        self.interior_sum = torch.zeros(channels[-1], self.num_nodes, device=self.device, dtype=torch.float64)
+        self.sum_start = self.sum_end = self.depth
+
+    def _slot(self, frame):
+        return frame % self.ring_size
+
+    def _frames(self, ring, start, stop):
+        """Gathers frames [start, stop) of a ring as (C, F, V); frames before the stream are zero padding."""
+        indices = torch.arange(start, stop, device=self.device)
+        frames = ring.index_select(1, indices % self.ring_size)
+        if start < 0:
+            frames[:, :(-start)] = 0
+        return frames
+
+    def _graph_conv(self, graph_conv, x):
+        return graph_conv(x.unsqueeze(0))[0]
+
+    def _temporal_conv(self, temporal_conv, z):
+        """Unpadded temporal conv: F + 2 input frames give F output frames."""
+        return F.relu(F.conv2d(z.unsqueeze(0), temporal_conv.weight, temporal_conv.bias))[0]
+
+    def _advance(self, t):
+        """Computes the one newly exposed step of every layer after frame t arrives."""
+        frame = self.inputs[:, self._slot(t)]
+        for level, (graph_conv, temporal_conv) in enumerate(self.layers):
+            # Layer `level` lags the input by `level` frames: its z is ready up to t - level
+            z_frame = t - level
+            if z_frame < 0:
+                return
+            self.z[level][:, self._slot(z_frame)] = self._graph_conv(graph_conv, frame.unsqueeze(1))[:, 0]
+
+            y_frame = z_frame - 1
+            if y_frame < 0:
+                return
+            frame = self._temporal_conv(temporal_conv, self._frames(self.z[level], y_frame - 1, y_frame + 2))[:, 0]
+            self.y[level][:, self._slot(y_frame)] = frame
+
+    def _edge(self, start, stop, head):
+        """Recomputes the last layer's activations for the `depth` frames at one end of window [start, stop)."""
+        recomputed = None  # The previous layer's frames that saw the zero padding
+        for level, (graph_conv, temporal_conv) in enumerate(self.layers):
+            z = self.z[level]
+            padding = torch.zeros(z.size(0), 1, self.num_nodes, device=self.device, dtype=self.dtype)
+            if head:
+                parts = [padding]
+                if recomputed is not None:
+                    parts.append(self._graph_conv(graph_conv, recomputed))
+                parts.append(self._frames(z, start + level, start + level + 2))
+            else:
+                parts = [self._frames(z, stop - level - 2, stop - level)]
+                if recomputed is not None:
+                    parts.append(self._graph_conv(graph_conv, recomputed))
+                parts.append(padding)
+            recomputed = self._temporal_conv(temporal_conv, torch.cat(parts, dim=1))
+        return recomputed
+
+    def _update_interior(self, start, stop):
+        """Moves the running sum to cover frames [start + depth, stop - depth) of the last layer."""
+        last = self.y[-1]
+        begin, end = start + self.depth, stop - self.depth
+        while self.sum_end < end:
+            if self.sum_end >= self.sum_start:
+                self.interior_sum += last[:, self._slot(self.sum_end)]
+            self.sum_end += 1
+        while self.sum_start < begin:
+            if self.sum_start < self.sum_end:
+                self.interior_sum -= last[:, self._slot(self.sum_start)]
+            self.sum_start += 1
+
+    @torch.inference_mode()
+    def push(self, keypoints):
+        """Adds one (33, >=3) frame of x, y, z keypoints and returns the window's (num_classes,) logits."""
+        t = self.frame_count
+        keypoints = torch.as_tensor(np.asarray(keypoints)[:, :3], device=self.device, dtype=self.dtype)
+        self.inputs[:, self._slot(t)] = keypoints.T
+        self.frame_count += 1
+        self._advance(t)
+
+        stop = self.frame_count
+        start = max(0, stop - self.window)
+        if stop - start < 2 * self.depth:
+            # Too short for separate edges: a full forward over a handful of frames
+            return self.model(self._frames(self.inputs, start, stop).unsqueeze(0))[0]
+
+        self._update_interior(start, stop)
+        total = (self.interior_sum.to(self.dtype)
+                 + self._edge(start, stop, head=True).sum(dim=1)
+                 + self._edge(start, stop, head=False).sum(dim=1))
+        pooled = total / (stop - start)
+        return self.model.fc(pooled.reshape(1, -1))[0]
+
+    def predict(self, keypoints):
+        """Pushes a frame and returns (class index, label or None, softmax confidence)."""
+        probabilities = torch.softmax(self.push(keypoints), dim=0)
+        idx = int(probabilities.argmax())
+        label = None
+        if self.label_map:
+            label = {v: k for k, v in self.label_map.items()}.get(idx)
+        return idx, label, float(probabilities[idx])
@@ -1,57 +1,148 @@
 from GraphConvolution import STGCN
+import os
+import time
 import torch
 import torch.optim as optim
-from torch.utils.data import DataLoader
-from formatDataset import PoseDataset
+from formatDataset import PoseDataset, make_loader, split_indices
+from evaluation import evaluate, print_report
 
-# Load dataset
-dataset_path = "pose_dataset_interpolated.npy"
-train_dataset = PoseDataset(dataset_path)
-train_loader = DataLoader(train_dataset, batch_size=16, shuffle=True)
+dataset_path = "pose_dataset_interpolated"
+val_fraction = 0.2  # Held-out clips per class for evaluation
+split_seed = 0      # Same seed -> same split, so evaluation.py can re-create it
 
 # Define ST-GCN model parameters
 in_channels = 3    # x, y, z coordinates
 num_nodes = 33     # BlazePose keypoints
 num_classes = 5    # Unique labels
 num_frames = 60   # Fixed frame length
+partition_strategy = "uniform"  # "spatial" splits the adjacency into ST-GCN root/closer/further partitions
 
-# Initialize model, loss function, and optimizer
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = STGCN(in_channels=in_channels, num_nodes=num_nodes, num_classes=num_classes, num_frames=num_frames).to(device)
-criterion = torch.nn.CrossEntropyLoss()
-optimizer = optim.Adam(model.parameters(), lr=0.001)
-
-# Training loop
+# Training settings
 num_epochs = 50
-for epoch in range(num_epochs):
+batch_size = 16
+learning_rate = 0.001
+eval_batch_size = 256
+eval_every = 5         # Epochs between validation passes
+use_compile = False    # torch.compile the model (slow first epoch, faster after)
+use_bf16 = False       # bf16 autocast; on CPU this needs AVX512-BF16/AMX to pay off
+
+# Weights, optimizer state, model config & label map; saved every checkpoint_every epochs and resumed from.
+# Also the input for exportModel.py / modelRuntime.py
+checkpoint_path = "stgcn_checkpoint.pt"
+checkpoint_every = 5
+resume = True
+
+
+def train_one_epoch(model, loader, criterion, optimizer, device, autocast_dtype=None):
+    """One pass over loader; returns (mean loss, accuracy, samples/sec) with a single host sync at the end."""
     model.train()
-    total_loss = 0
+    # Accumulated on the device: no .item() (and no sync) per batch
+    total_loss = torch.zeros((), device=device)
+    correct = torch.zeros((), dtype=torch.long, device=device)
+    samples = 0
 
-    for batch in train_loader:
-        inputs, labels = batch
-        inputs, labels = inputs.to(device), labels.to(device)
+    start = time.perf_counter()
+    for batch in loader:
+        inputs, labels = batch[0].to(device, non_blocking=True), batch[1].to(device, non_blocking=True)
 
-        optimizer.zero_grad()
-        outputs = model(inputs)
-        loss = criterion(outputs, labels)
+        optimizer.zero_grad(set_to_none=True)
+        with torch.autocast(device_type=device.type, dtype=autocast_dtype or torch.bfloat16,
+                            enabled=autocast_dtype is not None):
+            outputs = model(inputs)
+            loss = criterion(outputs, labels)
         loss.backward()
         optimizer.step()
 
-        # Get the predicted class (index with the highest score)
-        _, predicted = torch.max(outputs, 1)
+        total_loss += loss.detach() * labels.size(0)
+        correct += (outputs.argmax(dim=1) == labels).sum()
+        samples += labels.size(0)
+
+    total_loss, correct = total_loss.item(), correct.item()  # Syncs here, once per epoch
+    elapsed = time.perf_counter() - start
+    return total_loss / max(samples, 1), correct / max(samples, 1), samples / max(elapsed, 1e-9)
+
+
+def save_checkpoint(path, model, optimizer, epoch, model_config, label_map):
+    """Writes the checkpoint through a temporary file so an interruption never leaves a half-written one."""
+    tmp_path = path + ".tmp"
+    torch.save({
+        'model_state': model.state_dict(),
+        'optimizer_state': optimizer.state_dict(),
+        'epoch': epoch,
+        'config': model_config,
+        'label_map': label_map,
+        'val_fraction': val_fraction,
+        'split_seed': split_seed,
+    }, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_training_checkpoint(path, model, optimizer, label_map, device):
+    """Restores model & optimizer state from path; returns the epoch to continue from."""
+    checkpoint = torch.load(path, map_location=device)
+    if checkpoint.get('label_map') != label_map:
+        raise ValueError(f"{path} was trained on labels {checkpoint.get('label_map')}, dataset has {label_map}")
+    model.load_state_dict(checkpoint['model_state'])
+    if 'optimizer_state' in checkpoint:
+        optimizer.load_state_dict(checkpoint['optimizer_state'])
+    return checkpoint.get('epoch', 0)
+
+
+def main():
+    # Load dataset; packed into contiguous per-length tensors and batched by clip length, so clips
+    # PCHIP left above target_frames still batch without padding
+    dataset = PoseDataset(dataset_path, pack=True)
+    train_indices, val_indices = split_indices(dataset, val_fraction, split_seed)
+    train_loader = make_loader(dataset, batch_size=batch_size, shuffle=True, indices=train_indices,
+                               num_workers=0)  # A packed batch is one index_select
+    val_loader = make_loader(dataset, batch_size=eval_batch_size, shuffle=False, indices=val_indices, num_workers=0)
+    print(f"Training on {len(train_indices)} clips, validating on {len(val_indices)}")
+
+    # Initialize model, loss function, and optimizer
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model_config = {
+        'in_channels': in_channels,
+        'num_nodes': num_nodes,
+        'num_classes': num_classes,
+        'num_frames': num_frames,
+        'partition_strategy': partition_strategy,
+    }
+    model = STGCN(**model_config).to(device)
+    criterion = torch.nn.CrossEntropyLoss()
+    optimizer = optim.Adam(model.parameters(), lr=learning_rate)
+
+    start_epoch = 0
+    if resume and os.path.exists(checkpoint_path):
+        start_epoch = load_training_checkpoint(checkpoint_path, model, optimizer, dataset.label_map, device)
+        print(f"Resumed from {checkpoint_path} at epoch {start_epoch}")
+
+    # Checkpoints always come from the uncompiled model so their keys load anywhere
+    train_model = torch.compile(model) if use_compile else model
+    autocast_dtype = torch.bfloat16 if use_bf16 else None
 
-        # Check if the predictions match the true labels
-        correct = (predicted == labels).sum().item()
+    # Training loop
+    for epoch in range(start_epoch, num_epochs):
+        loss, accuracy, samples_per_sec = train_one_epoch(train_model, train_loader, criterion, optimizer,
+                                                          device, autocast_dtype)
+        print(f"Epoch [{epoch+1}/{num_epochs}], Loss: {loss:.4f}, Accuracy: {accuracy * 100:.2f}%, "
+              f"{samples_per_sec:.0f} samples/sec")
 
-        # Calculate accuracy
-        accuracy = correct / labels.size(0)  # labels.size(0) is the batch size
-        print(f'Accuracy: {accuracy * 100:.2f}%')
+        if len(val_indices) and (epoch + 1) % eval_every == 0:
+            metrics = evaluate(train_model, val_loader, num_classes, device, autocast_dtype)
+            print(f"  Validation accuracy: {metrics['accuracy'] * 100:.2f}% "
+                  f"({metrics['samples_per_sec']:.0f} clips/sec)")
 
+        if (epoch + 1) % checkpoint_every == 0:
+            save_checkpoint(checkpoint_path, model, optimizer, epoch + 1, model_config, dataset.label_map)
 
-        total_loss += loss.item()
+    print("Training complete!")
 
-    print(f"Epoch [{epoch+1}/{num_epochs}], Loss: {total_loss / len(train_loader):.4f}")
+    save_checkpoint(checkpoint_path, model, optimizer, num_epochs, model_config, dataset.label_map)
+    print(f"Saved checkpoint to {checkpoint_path}")
 
-print("Training complete!")
+    if len(val_indices):
+        print_report(evaluate(model, val_loader, num_classes, device), dataset.label_map)
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmarks for the pose pipeline's hot paths. No camera or model file is needed: they run on the
+shipped pose datasets and synthetic frames/landmarks.
+
+    python -m pytest benchmarks                                  # JSON autosaved under .benchmarks/
+    python -m pytest benchmarks --benchmark-json=results.json    # or to an explicit file
+    pytest-benchmark compare 0001 0002                           # compare two saved runs
+"""
+import os
+import sys
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("", "St-GCN_Model", "BlazePoseModels"):
+    sys.path.append(os.path.join(REPO_ROOT, folder))
+
+DATASET_PATH = os.path.join(REPO_ROOT, "pose_dataset.npy")
+INTERPOLATED_DATASET_PATH = os.path.join(REPO_ROOT, "pose_dataset_interpolated.npy")
+TARGET_FRAMES = 200  # Clip length makeOurDatset.py interpolates to
+
+FRAME_HEIGHT, FRAME_WIDTH = 720, 1280
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Keep every run as JSON unless the caller chose where results go
+    option = config.option
+    if hasattr(option, "benchmark_autosave") and not (option.benchmark_json or option.benchmark_save
+                                                      or option.benchmark_disable):
+        option.benchmark_autosave = True
+
+
+def make_landmarks(seed=0):
+    """A plausible (33, 4) normalized pose: points inside the frame, all visible."""
+    rng = np.random.default_rng(seed)
+    landmarks = np.empty((33, 4), dtype=np.float32)
+    landmarks[:, :2] = rng.uniform(0.2, 0.8, size=(33, 2))
+    landmarks[:, 2] = rng.uniform(-0.5, 0.5, size=33)
+    landmarks[:, 3] = 1.0
+    return landmarks
+
+
+@pytest.fixture
+def landmarks():
+    return make_landmarks()
+
+
+@pytest.fixture
+def detection_result(landmarks):
+    """Stand-in for a PoseLandmarkerResult with one detected pose."""
+    pose = [SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v)) for x, y, z, v in landmarks]
+    return SimpleNamespace(pose_landmarks=[pose], pose_world_landmarks=[])
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+
+
+@pytest.fixture(scope="session")
+def synthetic_clips():
+    """500 clips of mixed lengths below TARGET_FRAMES, like a freshly recorded dataset."""
+    rng = np.random.default_rng(0)
+    lengths = rng.choice([45, 60, 90, 120], size=500)
+    clips = [rng.standard_normal((length, 33, 3)).astype(np.float32) for length in lengths]
+    labels = [str(label) for label in rng.choice(["C", "OverServe", "None"], size=500)]
+    return clips, labels
@@ -0,0 +1,37 @@
+import pytest
+from conftest import INTERPOLATED_DATASET_PATH, REPO_ROOT
+
+pytest.importorskip("pytest_benchmark")
+import os
+from formatDataset import PoseDataset, make_loader
+from poseDatasetStore import write_pose_dataset
+
+
+@pytest.mark.parametrize("path", [INTERPOLATED_DATASET_PATH, os.path.join(REPO_ROOT, "pose_dataset_interpolated")],
+                         ids=["npy", "store"])
+def test_pose_dataset_construction(benchmark, path):
+    dataset = benchmark(PoseDataset, path)
+    assert len(dataset) > 0
+
+
+@pytest.fixture(scope="module")
+def synthetic_store(tmp_path_factory, synthetic_clips):
+    path = str(tmp_path_factory.mktemp("store") / "pose_dataset")
+    write_pose_dataset(path, *synthetic_clips)
+    return path
+
+
+@pytest.mark.parametrize("pack", [False, True], ids=["lazy", "packed"])
+def test_pose_dataset_construction_synthetic(benchmark, synthetic_store, pack):
+    benchmark(PoseDataset, synthetic_store, pack)
+
+
+@pytest.mark.parametrize("pack", [False, True], ids=["lazy", "packed"])
+def test_loader_epoch(benchmark, synthetic_store, pack):
+    dataset = PoseDataset(synthetic_store, pack=pack)
+    loader = make_loader(dataset, batch_size=16, num_workers=0, seed=0)
+
+    def epoch():
+        return sum(batch[0].size(0) for batch in loader)
+
+    assert benchmark(epoch) == len(dataset)
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("mediapipe")
+from types import SimpleNamespace
+import numpy as np
+from landmarkFrame import Rect
+from depthSampler import DepthSampler
+import gettingSpecificDepths as depths
+
+
+@pytest.fixture
+def results(detection_result):
+    """Stand-in for the legacy solutions output (results.pose_landmarks.landmark)."""
+    return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=detection_result.pose_landmarks[0]))
+
+
+def test_create_landmark_list(benchmark, results):
+    benchmark(depths.createLandmarkList, results)
+
+
+def test_bounding_box(benchmark, frame, results):
+    landmarks = depths.createLandmarkList(results)
+    benchmark(depths.createBoundingBoxAroudnPerson, frame, landmarks)
+
+
+def test_normalize_to_graph(benchmark, frame, results):
+    landmarks = depths.createLandmarkList(results)
+    h, w, _ = frame.shape
+    benchmark(depths.normalizeLandmarksToCVGraph, landmarks, Rect(0, w, 0, h), frame.shape)
+
+
+def test_draw_cv_graph(benchmark, frame, results):
+    landmarks = depths.createLandmarkList(results)
+    h, w, _ = frame.shape
+    points = depths.normalizeLandmarksToCVGraph(landmarks, Rect(0, w, 0, h), frame.shape)
+    benchmark(depths.drawCvGraph, points)
+
+
+def test_depth_sampler(benchmark, landmarks):
+    """Median metric depth at all 33 landmarks of an aligned 640x480 z16 frame."""
+    rng = np.random.default_rng(0)
+    depth_image = rng.integers(0, 4000, size=(480, 640), dtype=np.uint16)
+    sampler = DepthSampler(depth_scale=0.001)
+    benchmark(sampler.sample, depth_image, landmarks)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from conftest import DATASET_PATH, TARGET_FRAMES
+
+pytest.importorskip("pytest_benchmark")
+from PCHIP_Interploator import PCHIPInterpolator
+
+
+def _interpolator(path):
+    return (PCHIPInterpolator(path, TARGET_FRAMES),), {}
+
+
+def test_interpolate_sample(benchmark):
+    interpolator = PCHIPInterpolator(DATASET_PATH, TARGET_FRAMES)
+    clip = interpolator.dataset['data'][0]
+    result = benchmark(interpolator.interpolate_sample, clip)
+    assert result.shape == (TARGET_FRAMES,) + clip.shape[1:]
+
+
+def test_process_dataset_shipped(benchmark):
+    # A fresh interpolator per round: process_dataset appends to its output lists
+    benchmark.pedantic(lambda interpolator: interpolator.process_dataset(),
+                       setup=lambda: _interpolator(DATASET_PATH), rounds=20)
+
+
+@pytest.mark.parametrize("num_workers", [None, 2])
+def test_process_dataset_synthetic(benchmark, tmp_path, synthetic_clips, num_workers):
+    path = str(tmp_path / "clips.npy")
+    clips, labels = synthetic_clips
+    np.save(path, {'data': clips, 'labels': labels})
+
+    def run(interpolator):
+        interpolator.process_dataset(num_workers=num_workers)
+        assert len(interpolator.interpolated_data) == len(clips)
+
+    benchmark.pedantic(run, setup=lambda: _interpolator(path), rounds=3)
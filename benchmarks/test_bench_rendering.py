@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("mediapipe")
+import cv2
+import numpy as np
+from graphView import GraphView
+from skeletonRenderer import draw_points, draw_skeleton
+from videoInput import draw_landmarks_on_image
+
+
+def test_draw_landmarks_on_image(benchmark, frame, detection_result):
+    canvas = np.empty_like(frame)
+
+    def draw():
+        np.copyto(canvas, frame)  # Fresh frame each round, as in the video loop
+        return draw_landmarks_on_image(canvas, detection_result, bgr=True)
+
+    benchmark(draw)
+
+
+def test_draw_skeleton(benchmark, frame, landmarks):
+    benchmark(draw_skeleton, frame, landmarks)
+
+
+def test_graph_view_draw(benchmark, landmarks):
+    graph_view = GraphView(700, 940)
+    points = (landmarks[:, :2] * 600).astype(np.int32)
+    benchmark(graph_view.draw, points)
+
+
+@pytest.mark.parametrize("radius", [1, 2, 3, 4, 6, 9])
+def test_draw_points_matches_circle(radius):
+    """Joints are the same size as the cv2.circle dots they replaced."""
+    dots, circles = np.zeros((2, 64, 64), dtype=np.uint8)
+    draw_points(dots, [(20, 20), (40, 45)], radius, 255)
+    for point in ((20, 20), (40, 45)):
+        cv2.circle(circles, point, radius, 255, cv2.FILLED)
+    assert np.array_equal(dots, circles)
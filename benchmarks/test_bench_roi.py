@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("mediapipe")
+import numpy as np
+from landmarkFrame import Rect
+from roiTracker import RoiTracker, ROI_SIZE
+
+# Fractional boxes: tiny, smaller than ROI_SIZE (upscaled crops), large, and hanging off each edge
+BOXES = [
+    Rect(1000.9, 1200.9, 300.9, 600.9),
+    Rect(1000.2, 1030.7, 500.5, 540.4),
+    Rect(10.6, 90.3, 20.8, 200.1),
+    Rect(-40.5, 300.5, 700.3, 1079.9),
+    Rect(1700.1, 1919.9, -20.7, 400.2),
+    Rect(600.5, 1300.5, 100.5, 1000.5),
+]
+
+
+@pytest.mark.parametrize("roi", BOXES)
+def test_crop_maps_back_to_frame(roi):
+    """A spot inside the box lands in the crop and maps back to within a crop pixel of where it was."""
+    h, w = 1080, 1920
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    x = int(np.clip((roi.x1 + roi.x2) / 2, 5, w - 6))
+    y = int(np.clip((roi.y1 + roi.y2) / 2, 5, h - 6))
+    frame[y - 4:y + 5, x - 4:x + 5] = 255
+
+    tracker = RoiTracker(detector=None)
+    mapping = tracker._crop(frame, roi)
+    assert mapping is not None
+
+    crop = tracker.crop[..., 0].astype(np.float64)
+    cy, cx = np.argwhere(crop == crop.max()).mean(axis=0)
+    landmarks = np.zeros((33, 4), dtype=np.float32)
+    landmarks[:, 0], landmarks[:, 1] = (cx + 0.5) / ROI_SIZE, (cy + 0.5) / ROI_SIZE
+    tracker._to_frame(landmarks, mapping, w, h)
+
+    (_, sx), (_, sy) = mapping
+    assert abs(landmarks[0, 0] * w - (x + 0.5)) <= max(sx, 1) + 0.5
+    assert abs(landmarks[0, 1] * h - (y + 0.5)) <= max(sy, 1) + 0.5
+
+
+def test_crop_4k(benchmark):
+    """Cropping & downscaling a tracked athlete out of a 4K frame."""
+    frame = np.random.default_rng(0).integers(0, 256, size=(2160, 3840, 3), dtype=np.uint8)
+    tracker = RoiTracker(detector=None)
+    benchmark(tracker._crop, frame, Rect(1500.5, 1900.5, 600.5, 1500.5))
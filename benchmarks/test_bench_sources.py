@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+import numpy as np
+from frameSources import SessionRecorder, SessionSource, FAST
+from framePipeline import FramePipeline, BLOCK
+
+SESSION_FRAMES = 60
+
+
+@pytest.fixture(scope="module")
+def session_path(tmp_path_factory):
+    """A recorded 640x480 color + depth session, as written by RECORD_PATH in the live scripts."""
+    path = str(tmp_path_factory.mktemp("session"))
+    rng = np.random.default_rng(0)
+    color = rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+    depth = rng.integers(0, 4000, size=(480, 640), dtype=np.uint16)
+    with SessionRecorder(path, depth_scale=0.001) as recorder:
+        for idx in range(SESSION_FRAMES):
+            recorder.write(color, depth, idx * 1000 / 60)
+    return path
+
+
+def test_session_replay(benchmark, session_path):
+    """Decode throughput of an as-fast-as-possible replay."""
+    benchmark(lambda: sum(1 for _ in SessionSource(session_path, FAST)))
+
+
+def test_session_replay_through_pipeline(benchmark, session_path):
+    """Replay through the live loops' capture -> inference -> render threads (no-op inference)."""
+    def run():
+        source = SessionSource(session_path, FAST)
+        with FramePipeline(source.read, lambda frame: None, drop_policy=BLOCK) as pipeline:
+            return sum(1 for _ in pipeline)
+
+    assert benchmark(run) == SESSION_FRAMES
@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+import torch
+from GraphConvolution import STGCN
+from streamingInference import StreamingSTGCN
+
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    return STGCN(num_classes=5).eval()
+
+
+@pytest.mark.parametrize("num_frames", [60, 200])
+@pytest.mark.parametrize("batch_size", [1, 16, 64])
+def test_stgcn_forward(benchmark, model, batch_size, num_frames):
+    inputs = torch.randn(batch_size, 3, num_frames, 33)
+
+    def forward():
+        with torch.inference_mode():
+            return model(inputs)
+
+    assert benchmark(forward).shape == (batch_size, 5)
+
+
+@pytest.mark.parametrize("window", [60, 200])
+def test_streaming_push(benchmark, model, window):
+    streaming = StreamingSTGCN(model, window)
+    frames = torch.randn(window, 33, 3).numpy()
+    for keypoints in frames:
+        streaming.push(keypoints)  # Fill the window so every round is a steady-state frame
+
+    assert benchmark(streaming.push, frames[0]).shape == (5,)
@@ -1,125 +1,193 @@
-import pyrealsense2 as rs
 import cv2
 import numpy as np
-from mediapipe import solutions
-from mediapipe.framework.formats import landmark_pb2
 import numpy as np
 import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
-
-#Create Pos marker - wget https://path-to-model/pose_landmarker.task -O pose_landmarker.task
-base_options = python.BaseOptions(model_asset_path='pose_landmarker.task')
-options = vision.PoseLandmarkerOptions(
-    base_options=base_options,
-    output_segmentation_masks=True
-)
-detector = vision.PoseLandmarker.create_from_options(options)
-
-
-
-def draw_landmarks_on_image(rgb_image, detection_result):
-  pose_landmarks_list = detection_result.pose_landmarks
-  annotated_image = np.copy(rgb_image)
-
-  # Loop through the detected poses to visualize.
-  for idx in range(len(pose_landmarks_list)):
-    pose_landmarks = pose_landmarks_list[idx]
-
-    # Draw the pose landmarks.
-    pose_landmarks_proto = landmark_pb2.NormalizedLandmarkList()
-    pose_landmarks_proto.landmark.extend([
-      landmark_pb2.NormalizedLandmark(x=landmark.x, y=landmark.y, z=landmark.z) for landmark in pose_landmarks
-    ])
-    solutions.drawing_utils.draw_landmarks(
-      annotated_image,
-      pose_landmarks_proto,
-      solutions.pose.POSE_CONNECTIONS,
-      solutions.drawing_styles.get_default_pose_landmarks_style())
-    
-    
-    #what are we converting to here? Come back
-    h,w,_ = annotated_image.shape
-    landmark_Coordinates: dict = {i: (int(landmark.x * w), int(landmark.y * h)) for i,landmark in enumerate (pose_landmarks)}
-
-    if not landmark_Coordinates:
-        landmark_Coordinates = {}
-    # print(landmark_Coordinates)
-    return annotated_image, landmark_Coordinates
-
-
-def process_and_save(imageArray, detector):
-    #change input here
-    imageCreator = mp.Image
-    mpImage = imageCreator(mp.ImageFormat.SRGB, imageArray)
-
-    detection_result = detector.detect(mpImage)
-
-    #could speed things up here posible
-    annotated_image,landmark_Coordinates = draw_landmarks_on_image(mpImage.numpy_view(), detection_result)
-
-
-    return annotated_image, landmark_Coordinates
-
-
-# Configure the RealSense pipeline
-pipeline = rs.pipeline()
-config = rs.config()
-
-# Enable depth and color streams
-config.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, 60)
-# config.enable_stream(rs.stream.depth, 640, 480, rs.format.z16, 15)
-
-pipeline.start(config)
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "BlazePoseModels"))
+from framePipeline import FramePipeline, DROP_OLDEST
+from poseLandmarker import PoseDetector, LIVE_RUNNING_MODE, VIDEO, EMPTY_RESULT, landmarks_to_array
+from skeletonRenderer import draw_skeleton, landmarks_to_pixels
+from graphView import GraphView
+from stageMetrics import StageMetrics
+from adaptiveScheduler import AdaptiveScheduler, VELOCITY, PCHIP
+from depthSampler import DepthSampler, yaw_degrees
+from frameSources import open_source, REALSENSE, REAL_TIME
+
+# Live stroke classification: point this at a trained STGCN checkpoint to enable it
+STROKE_MODEL_PATH = None
+STROKE_WINDOW = 60  # Frames per classification window, same as the training clips
+
+# Capture, inference and rendering run on separate threads connected by queues of this size.
+# DROP_OLDEST keeps latency bounded when a stage falls behind; BLOCK processes every frame.
+QUEUE_SIZE = 2
+DROP_POLICY = DROP_OLDEST
+
+# Adaptive scheduling for weak CPUs: the detector only runs as often as DETECT_BUDGET_MS per camera frame
+# (and MAX_DETECT_FPS) allows; the frames in between get estimated landmarks, so every frame still has a pose
+ADAPTIVE_SCHEDULING = False
+DETECT_BUDGET_MS = 8   # Average detector time allowed per camera frame
+MAX_DETECT_FPS = None  # e.g. 20
+ESTIMATOR = VELOCITY   # VELOCITY or PCHIP
+
+# Where frames come from and how replays are paced, see open_source(); RECORD_PATH records whatever is
+# captured as a session directory for replaying later
+FRAME_SOURCE = REALSENSE
+REPLAY_PACING = REAL_TIME
+RECORD_PATH = None
+
+# Metric depth at the landmarks (RealSense, .bag or recorded session with depth): depth is aligned to color
+# on the capture thread and sampled at all 33 landmark pixels at once
+USE_DEPTH = False
+
+# Per-stage latency: on-screen overlay, optional JSONL log and Prometheus endpoint (http://host:port/metrics)
+SHOW_METRICS = True
+METRICS_JSONL_PATH = None  # e.g. "metrics.jsonl", one summary line per second
+METRICS_PORT = None        # e.g. 9100
+
+metrics = StageMetrics(jsonl_path=METRICS_JSONL_PATH)
+if METRICS_PORT:
+    metrics.serve_prometheus(METRICS_PORT)
+
+scheduler = None
+if ADAPTIVE_SCHEDULING:
+    # The scheduler needs each detection's result (and cost) right away, so the detector runs synchronously
+    detector = PoseDetector(VIDEO)
+    scheduler = AdaptiveScheduler(metrics.timed("detect", lambda imageArray, timestamp_ms: landmarks_to_array(
+                                      detector.detect(mp.Image(mp.ImageFormat.SRGB, imageArray), timestamp_ms))),
+                                  DETECT_BUDGET_MS, MAX_DETECT_FPS, ESTIMATOR)
+else:
+    #Create Pos marker; LIVE_RUNNING_MODE queues frames with detect_async instead of blocking capture
+    # The callback times the asynchronous inference itself: auto timestamps come from the monotonic clock
+    detector = PoseDetector(LIVE_RUNNING_MODE, result_callback=lambda result, image, timestamp_ms:
+                            metrics.record("inference", time.monotonic() - timestamp_ms / 1000))
+
+stroke_classifier = None
+if STROKE_MODEL_PATH:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "St-GCN_Model"))
+    from streamingInference import StreamingSTGCN
+    # Caches per-layer activations so each new frame costs the same whatever the window length
+    stroke_classifier = StreamingSTGCN.from_checkpoint(STROKE_MODEL_PATH, window=STROKE_WINDOW)
+
+
+
+def draw_landmarks_on_image(image, landmarks, bgr=False):
+  """Draws a (33, 4) pose straight into image (no copy); returns it with the pose's (33, 2) pixel coordinates."""
+  if np.isnan(landmarks[:, 0]).all():
+    return image, np.empty((0, 2), dtype=np.int32)
+
+  h, w, _ = image.shape
+  draw_skeleton(image, landmarks, bgr=bgr)
+  return image, landmarks_to_pixels(landmarks, w, h)
+
+
+def detect_pose(frame):
+    """Inference stage: queues one frame and returns the latest finished (result, timestamp_ms, its frame).
+
+    In LIVE_STREAM mode that result comes from an earlier frame, which is handed back with it so the
+    render stage draws (and samples depth) on the frame the pose was detected in. With the adaptive
+    scheduler it returns (landmarks, estimated) for every frame instead.
+    """
+    imageArray, _, timestamp_ms = frame
+    if scheduler is not None:
+        return scheduler.process(imageArray, timestamp_ms)
+
+    with metrics.time("convert"):
+        mpImage = mp.Image(mp.ImageFormat.SRGB, imageArray)
+    with metrics.time("detect"):
+        return detector.detect_async(mpImage, context=frame)
+
+
+# Open the frame source; RealSense depth runs at the color rate so every color frame has an aligned depth frame
+source = open_source(FRAME_SOURCE, REPLAY_PACING, depth=USE_DEPTH, fps=60, record_path=RECORD_PATH)
+depth_sampler = DepthSampler(source.depth_scale, source.intrinsics) if USE_DEPTH and source.depth_scale else None
 
 
 #Setup open CV Graph Canvas
 width, height = 700, 940
-canvas = np.ones((height, width, 3), dtype=np.uint8) * 255
-
-try:
-    while True:
-        # Wait for the next frame
-        frames = pipeline.wait_for_frames()
-        color_frame = frames.get_color_frame()
-        # depth_frame = frames.get_depth_frame()
-
-        # Convert images to numpy arrays
-        color_image = np.asanyarray(color_frame.get_data())
-        # depth_image = np.asanyarray(depth_frame.get_data())
-
-
-        #alter images 
-        annotated_image, landmark_Coordinates = process_and_save(color_image, detector)
-
-        cv2.imshow("Color Stream", annotated_image)
+graph_view = GraphView(width, height)
 
-        # depth_colormap = cv2.applyColorMap(cv2.convertScaleAbs(depth_image, alpha=0.03), cv2.COLORMAP_JET)
-        # cv2.imshow("Depth Stream", depth_colormap)
+# Render stage stays on the main thread, where cv2.imshow has to run
+frame_pipeline = FramePipeline(metrics.timed("capture", source.read), detect_pose, queue_size=QUEUE_SIZE, drop_policy=DROP_POLICY)
+frame_pipeline.start()
+display_image = None
+last_timestamp_ms = None
+stroke_text = None
 
-
-        #update points
-        points = landmark_Coordinates
-
-        canvas = np.ones((height, width, 3), dtype=np.uint8) * 255  # Clear canvas
-    
-        # Draw axes
-        cv2.line(canvas, (50, height - 50), (width - 50, height - 50), (0, 0, 0), 2)  # X-axis
-        cv2.line(canvas, (50, height - 50), (50, 50), (0, 0, 0), 2)  # Y-axis
-
-        # Plot points
-        if(points!= None):
-            for i in range(1, len(points)):
-                cv2.circle(canvas, points[i], 3, (0, 0, 255), -1)
-
-        # Show the updated image
-        cv2.imshow("Real-Time Graph", canvas)
-
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+try:
+    for frame, inference in frame_pipeline:
+        if scheduler is not None:
+            landmarks, estimated = inference
+        else:
+            # LIVE_STREAM results finish after their frame: show (and measure) each on the frame it came from.
+            # The same result comes back until a new one finishes; a repeat is a held pose
+            result, result_timestamp_ms, result_frame = inference
+            if result_frame is not None:
+                frame = result_frame
+            else:
+                result = EMPTY_RESULT  # Its frame is gone; never draw a pose on another frame
+            landmarks, estimated = landmarks_to_array(result), result_timestamp_ms == last_timestamp_ms
+            last_timestamp_ms = result_timestamp_ms
+        color_image, depth_image, _ = frame
+        has_pose = not np.isnan(landmarks[0, 0])
+
+        with metrics.time("draw"):
+            # Draw into a reused display buffer; the camera frame itself stays untouched
+            if display_image is None:
+                display_image = np.empty_like(color_image)
+            np.copyto(display_image, color_image)
+
+            #alter images 
+            annotated_image, landmark_Coordinates = draw_landmarks_on_image(display_image, landmarks, bgr=True)
+
+            #update points (landmark 0 is left out, as before)
+            points = landmark_Coordinates[1:]
+
+            # Reset the prerendered axes and plot every point in one call
+            canvas = graph_view.draw(points)
+
+        # Classify each pose once; scheduled estimates are per camera frame, so they all go in
+        if stroke_classifier is not None and has_pose and (scheduler is not None or not estimated):
+            with metrics.time("classify"):
+                _, stroke, confidence = stroke_classifier.predict(landmarks)
+            stroke_text = f"{stroke} {confidence:.2f}"
+        if stroke_text:
+            cv2.putText(annotated_image, stroke_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+        if depth_sampler is not None and depth_image is not None and has_pose:
+            with metrics.time("depth"):
+                depths = depth_sampler.sample(depth_image, landmarks)
+                yaw = yaw_degrees(depth_sampler.points(landmarks, depths))
+            cv2.putText(annotated_image, f"Yaw {yaw:.1f} deg", (annotated_image.shape[1] - 200, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        metrics.set_gauge("dropped_frames", frame_pipeline.dropped_frames)
+        if scheduler is not None:
+            metrics.set_gauge("detection_rate", round(scheduler.detection_rate, 3))
+        if SHOW_METRICS:
+            metrics.draw_overlay(annotated_image, origin=(10, 60))
+
+        with metrics.time("show"):
+            cv2.imshow("Color Stream", annotated_image)
+
+            if depth_sampler is not None and depth_image is not None:
+                depth_colormap = cv2.applyColorMap(cv2.convertScaleAbs(depth_image, alpha=0.03), cv2.COLORMAP_JET)
+                cv2.imshow("Depth Stream", depth_colormap)
+
+            # Show the updated image
+            cv2.imshow("Real-Time Graph", canvas)
+
+            key = cv2.waitKey(1) & 0xFF
+        metrics.tick()
+
+        if key == ord('q'):
             break
 finally:
-    pipeline.stop()
+    frame_pipeline.stop()
+    source.close()
+    detector.close()
     cv2.destroyAllWindows()
 
 
@@ -2,74 +2,35 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import time
+import os
+import sys
 
-class NormalizedLandmark:
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
-class Rect:
-    def __init__(self, x1,x2,y1,y2):
-        self.x1 = x1
-        self.x2 = x2
-        self.y1 = y1
-        self.y2 = y2
-
-def createLandmarkList(frameShape, results):
-    landmarks = results.pose_landmarks.landmark
-    h,w,_ = frameShape
-
-    normalizedLandmarks =[]
-    for landmark in landmarks:
-        normalizedLandmarks.append( NormalizedLandmark(int(landmark.x * w), int(landmark.y * h), landmark.z) )
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "BlazePoseModels"))
+from graphView import GraphView
+from landmarkFrame import LandmarkFrame, Rect
+from stageMetrics import StageMetrics
+from frameSources import open_source
 
-    if not normalizedLandmarks:
-        return []
-    else:
-        return normalizedLandmarks
+def createLandmarkList(results, out=None):
+    """Wraps the detected pose in an array-backed LandmarkFrame (filling out, e.g. a clip row, if given)."""
+    return LandmarkFrame.from_pose_landmarks(results.pose_landmarks.landmark, out)
 
 
 def createBoundingBoxAroudnPerson(frame, landmarks):
-    greatestX = -100000
-    minimalX = 1000000
-    greatestY = -100000
-    minimalY = 100000
-
-    for landmark in landmarks:
-        if landmark.x > greatestX:
-            greatestX = landmark.x
-        if landmark.x < minimalX:
-            minimalX = landmark.x
-        if landmark.y > greatestY:
-            greatestY = landmark.y
-        if landmark.y< minimalY:
-            minimalY = landmark.y
-
-    cv2.rectangle(frame, (minimalX, minimalY), (greatestX, greatestY), (255, 0, 0), 2)
-    return Rect(minimalX, greatestX, minimalY, greatestY)
-
-def normalizeLandmarksToCVGraph(landmarks, rect):
-    return [
-            NormalizedLandmark(
-                int((l.x - rect.x1) / (rect.x2 - rect.x1) * 625) +50,  # Normalize X
-                int((l.y - rect.y1) / (rect.y2 - rect.y1) * 625)+50,
-                l.z
-            )
-            for l in landmarks
-        ]
+    h,w,_ = frame.shape
+    rect = landmarks.bounding_box(w, h)
+
+    cv2.rectangle(frame, (rect.x1, rect.y1), (rect.x2, rect.y2), (255, 0, 0), 2)
+    return rect
+
+def normalizeLandmarksToCVGraph(landmarks, rect, frameShape):
+    h,w,_ = frameShape
+    return landmarks.normalized_to(rect, w, h)  # (33, 2) graph coordinates
 
 
 def drawCvGraph(landmarkPoints):
-    canvas = np.ones((height, width, 3), dtype=np.uint8) * 255  # Clear canvas
-    
-    # Draw axes
-    cv2.line(canvas, (50, height - 50), (width - 50, height - 50), (0, 0, 0), 2)  # X-axis
-    cv2.line(canvas, (50, height - 50), (50, 50), (0, 0, 0), 2)  # Y-axis
-
-        # Plot points
-    if(landmarkPoints!= None):
-        for l in landmarkPoints:
-            cv2.circle(canvas, (l.x, l.y), 5, (0, 255, 0), -1)
+    # Reset the prerendered axes and plot every point in one call
+    canvas = graph_view.draw(landmarkPoints if landmarkPoints is not None else [])
         
         # y= int(-landmarks[12].z *500)  + 450
 
@@ -81,50 +42,77 @@ def drawCvGraph(landmarkPoints):
 
 
 
-# Initialize MediaPipe Pose
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(static_image_mode=False, model_complexity=2)
-mp_drawing = mp.solutions.drawing_utils
+width, height = 900, 940
+graph_view = GraphView(width, height, point_radius=5, point_color=(0, 255, 0))
+
+# Per-stage latency: on-screen overlay, optional JSONL log and Prometheus endpoint (http://host:port/metrics)
+SHOW_METRICS = True
+METRICS_JSONL_PATH = None  # e.g. "metrics.jsonl", one summary line per second
+METRICS_PORT = None        # e.g. 9100
 
-# Start Video Capture
-cap = cv2.VideoCapture(0)
+FRAME_SOURCE = "webcam:0"  # Any open_source() spec
 
-width, height = 900, 940
-canvas = np.ones((height, width, 3), dtype=np.uint8) * 255
 
+# Webcam loop only when run as a script, so the helpers above can be imported (e.g. by the benchmarks)
+if __name__ == "__main__":
+    # Initialize MediaPipe Pose
+    mp_pose = mp.solutions.pose
+    pose = mp_pose.Pose(static_image_mode=False, model_complexity=2)
+    mp_drawing = mp.solutions.drawing_utils
 
+    metrics = StageMetrics(jsonl_path=METRICS_JSONL_PATH)
+    if METRICS_PORT:
+        metrics.serve_prometheus(METRICS_PORT)
 
+    # Start Video Capture
+    source = open_source(FRAME_SOURCE)
 
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
+    while True:
+        with metrics.time("capture"):
+            captured = source.read()
+        if captured is None:
+            break
+        frame = captured[0]
 
-    # Convert frame to RGB
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(frame_rgb)
+        # Convert frame to RGB
+        with metrics.time("convert"):
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with metrics.time("detect"):
+            results = pose.process(frame_rgb)
 
-    if results.pose_landmarks:
+        graphCanvas = None
+        if results.pose_landmarks:
 
         
-        h,w,_ = frame.shape
+            h,w,_ = frame.shape
 
-        landmarks = createLandmarkList(frame.shape, results)
+            with metrics.time("landmarks"):
+                landmarks = createLandmarkList(results)
 
-        # boundingBox = createBoundingBoxAroudnPerson(frame,landmarks)
+                # boundingBox = createBoundingBoxAroudnPerson(frame,landmarks)
 
-        graphCanvas = drawCvGraph(normalizeLandmarksToCVGraph(landmarks, Rect(0,w,0,h)))
-        
-        cv2.imshow("Real-Time Graph", graphCanvas)
+                graphPoints = normalizeLandmarksToCVGraph(landmarks, Rect(0,w,0,h), frame.shape)
+
+            with metrics.time("draw"):
+                graphCanvas = drawCvGraph(graphPoints)
+
+                # Draw landmarks
+                mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+
+        if SHOW_METRICS:
+            metrics.draw_overlay(frame)
 
-        # Draw landmarks
-        mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+        # Show frame
+        with metrics.time("show"):
+            if graphCanvas is not None:
+                cv2.imshow("Real-Time Graph", graphCanvas)
+            cv2.imshow("Spin Detection", frame)
 
-    # Show frame
-    cv2.imshow("Spin Detection", frame)
+            key = cv2.waitKey(1) & 0xFF
+        metrics.tick()
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+        if key == ord('q'):
+            break
 
-cap.release()
-cv2.destroyAllWindows()
+    source.close()
+    cv2.destroyAllWindows()